@@ -0,0 +1,197 @@
+"""
+Benchmark the IntCode computer options on the intcode puzzles.
+
+Every workload is the unmodified ``main1``/``main2`` of a day module, run
+with the module's ``Computer`` replaced by the variant under test.
+Usage: ``python benchmark.py [repeat]``.
+"""
+
+import sys
+import tempfile
+from functools import partial
+from time import perf_counter
+from typing import Callable, Dict, List
+
+from texttable import Texttable
+
+import day2
+import day5
+import day9
+import day11
+import day13
+import intcode
+from intcode import BACKENDS, Computer
+from intcode_checkpoint import WarmStart
+from intcode_memory import MEMORY_BACKENDS
+from runner import run_with
+
+WORKLOADS = {
+    "day2": (day2, (day2.main1, lambda: day2.search(day2.read_input()))),
+    "day5": (day5, (day5.main1, day5.main2)),
+    "day9": (day9, (day9.main1, day9.main2)),
+    "day11": (day11, (day11.main1, day11.main2)),
+    "day13": (day13, (day13.main1, day13.main2)),
+}
+
+
+def time_workload(name: str, factory: Callable[..., Computer],
+                  repeat: int = 1) -> float:
+    """Return the best time of running workload ``name`` with ``factory``."""
+    module, mains = WORKLOADS[name]
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        run_with(module, factory, mains)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def compare(variants: Dict[str, Callable[..., Computer]], repeat: int = 1,
+            workloads: List[str] = None) -> Texttable:
+    """Time every workload for every variant of Computer factory."""
+    workloads = workloads or list(WORKLOADS)
+    table = Texttable()
+    table.set_cols_dtype(["t"] + ["f"] * len(variants))
+    table.set_precision(3)
+    table.header(["workload"] + list(variants))
+    for name in workloads:
+        table.add_row([name] + [time_workload(name, factory, repeat)
+                                for factory in variants.values()])
+    return table
+
+
+def time_call(function: Callable[[], object], repeat: int = 1,
+              setup: Callable[[], object] = lambda: None) -> float:
+    """Return the best time of calling ``function`` after ``setup``."""
+    best = float("inf")
+    for _ in range(repeat):
+        setup()
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def loading(repeat: int = 1, constructions: int = 1000) -> Texttable:
+    """
+    Time loading each intcode input: parsing it cold, reading the on-disk
+    cache, hitting the in-process cache, and constructing ``constructions``
+    computers from the path without and with the in-process cache.
+    """
+    table = Texttable()
+    table.set_cols_dtype(["t", "f", "f", "f", "f", "f"])
+    table.set_precision(6)
+    table.header(["input", "cold", "disk cache", "memory cache",
+                  f"{constructions} x Computer", "cached"])
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in WORKLOADS:
+            path = f"{name}-input"
+            intcode.load_program(path, cache_dir)
+            clear = intcode.PROGRAM_CACHE.clear
+            table.add_row([
+                path,
+                time_call(lambda: intcode.load_program(path), repeat, clear),
+                time_call(lambda: intcode.load_program(path, cache_dir),
+                          repeat, clear),
+                time_call(lambda: intcode.load_program(path), repeat),
+                time_call(lambda: [clear() or Computer(path)
+                                   for _ in range(constructions)], repeat),
+                time_call(lambda: [Computer(path)
+                                   for _ in range(constructions)], repeat)])
+    return table
+
+
+def decode_arithmetic(number: int):
+    """Decode an instruction word by digit arithmetic, for comparison."""
+    return number % 100, (number // 100 % 10, number // 1000 % 10,
+                           number // 10000 % 10)
+
+
+def decoding(repeat: int = 1, rounds: int = 100) -> Texttable:
+    """
+    Time decoding every legal instruction word of each intcode input
+    ``rounds`` times, by digit arithmetic and by ``intcode.decode``.
+    """
+    table = Texttable()
+    table.set_cols_dtype(["t", "i", "f", "f"])
+    table.set_precision(6)
+    table.header(["input", "words", "arithmetic", "table"])
+    for name in WORKLOADS:
+        path = f"{name}-input"
+        words = [number for number in intcode.load_program(path)
+                 if number in intcode.DECODE_TABLE] * rounds
+        table.add_row([
+            path, len(words) // rounds,
+            time_call(lambda: [decode_arithmetic(n) for n in words], repeat),
+            time_call(lambda: [intcode.decode(n) for n in words], repeat)])
+    return table
+
+
+def fusion_sites() -> Texttable:
+    """Count the superinstructions found in each intcode input."""
+    table = Texttable()
+    table.set_cols_dtype(["t", "i", "i"])
+    table.header(["input", "compare-branch", "add-to-self"])
+    for day in (2, 5, 7, 9, 11, 13):
+        path = f"day{day}-input"
+        program = intcode.load_program(path)
+        fused, _ = intcode.find_fusions(dict(enumerate(program)))
+        opcodes = [opcode for opcode, _ in fused.values()]
+        table.add_row([path,
+                       sum(op in intcode.COMPARE_BRANCH for op in opcodes),
+                       opcodes.count(intcode.ADD_SELF)])
+    return table
+
+
+def warm_starts(repeat: int = 1) -> Texttable:
+    """
+    Time running a program until it needs input against restoring the
+    checkpoint of that run, from a file and from memory.
+    """
+    runs = [("day9-input", {}, []), ("day13-input", {0: 2}, [])]
+    table = Texttable()
+    table.set_cols_dtype(["t", "f", "f", "f"])
+    table.set_precision(6)
+    table.header(["run", "cold", "from file", "in process"])
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for path, patches, inputs in runs:
+            cold = WarmStart(cache_dir)
+            cold.start(path, patches, inputs)
+            table.add_row([
+                f"{path} {patches} {inputs}",
+                time_call(lambda: WarmStart().start(path, patches, inputs),
+                          repeat),
+                time_call(lambda: WarmStart(cache_dir).start(
+                    path, patches, inputs), repeat),
+                time_call(lambda: cold.start(path, patches, inputs),
+                          repeat)])
+    return table
+
+
+def benchmark(title: str, make_table: Callable[[], Texttable]):
+    """Print a titled table."""
+    print(title)
+    print(make_table().draw())
+
+
+def main():
+    """Run all benchmarks."""
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    benchmark("Program loading (seconds):", lambda: loading(repeat))
+    benchmark("Warm starts (seconds):", lambda: warm_starts(repeat))
+    benchmark("Instruction decoding (seconds):", lambda: decoding(repeat))
+    benchmark("Superinstruction sites:", fusion_sites)
+    benchmark("Superinstruction fusion (seconds):",
+              lambda: compare({"plain": Computer,
+                               "fused": partial(Computer, fuse=True)},
+                              repeat))
+    benchmark("Memory backends (seconds):",
+              lambda: compare({name: partial(Computer, memory=name)
+                               for name in MEMORY_BACKENDS}, repeat))
+    benchmark("Execution engines (seconds):",
+              lambda: compare({name: partial(Computer, backend=name)
+                               for name in BACKENDS}, repeat))
+
+
+if __name__ == '__main__':
+    main()
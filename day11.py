@@ -137,18 +137,7 @@ class Robot:
         self.position = 0, 0
         self.direction = Direction.UP
         self.encountered_positions = {(0, 0): start_color}
-        self.computer_output = []
-
-        def out(value):
-            """The function the intcode computer should use for output."""
-            self.computer_output.append(value)
-            return True
-
-        def get_color():
-            """The function the intcode computer should use to read input."""
-            return self.encountered_positions.get(self.position, 0)
-
-        self.computer = Computer(program, get_color, out)
+        self.computer = Computer(program)
 
     def run(self):
         """
@@ -156,16 +145,17 @@ class Robot:
         its output.
         """
         while not self.computer.has_halted():
-            self.computer.evaluate()
-            if self.computer.has_halted():
-                break
-            self.computer.evaluate()
-            [color, direction] = self.computer_output
-            self.computer_output.clear()
-            self.encountered_positions[self.position] = color
-            self.direction = self.direction.turn_right() if direction \
-                else self.direction.turn_left()
-            self.position = self.direction.move(*self.position)
+            camera = self.encountered_positions.get(self.position, 0)
+            output = self.computer.run_until_input([camera])
+            for color, direction in zip(output[::2], output[1::2]):
+                self.paint(color, direction)
+
+    def paint(self, color, direction):
+        """Paint the current position, then turn and move."""
+        self.encountered_positions[self.position] = color
+        self.direction = self.direction.turn_right() if direction \
+            else self.direction.turn_left()
+        self.position = self.direction.move(*self.position)
 
 
 def render(encountered_positions):
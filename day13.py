@@ -112,28 +112,20 @@ def main1():
 
 def main2():
     """Beat the game automatically and print the final score."""
-
+    computer = Computer("day13-input")
+    computer.memory[0] = 2
     output = []
+    inputs = []
     joystick = 0
     paddle_x_pos = None
     ball_x_pos = None
     score = 0
 
-    def inp():
-        """Return the current joystick position."""
-        return joystick
-
-    def out(value):
-        """Wait until a triple has been read, then adjust position/joystick."""
-        nonlocal paddle_x_pos
-        nonlocal ball_x_pos
-        nonlocal joystick
-        nonlocal output
-        nonlocal score
-        output.append(value)
-        if len(output) == 3:
-            i, j, tile_id = output
-            output = []
+    while not computer.has_halted():
+        output.extend(computer.run_until_input(inputs))
+        while len(output) >= 3:
+            i, j, tile_id = output[:3]
+            del output[:3]
             if i == -1 and j == 0:
                 score = tile_id
             elif tile_id == 3:
@@ -148,12 +140,7 @@ def main2():
                 joystick = -1
             else:
                 joystick = 0
-
-        return False
-
-    computer = Computer("day13-input", inp, out)
-    computer.memory[0] = 2
-    computer.evaluate()
+        inputs = [joystick]
 
     print(score)
 
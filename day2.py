@@ -130,9 +130,14 @@ answer would be 1202.)
 
 """
 
-from typing import List
+from itertools import product
+from typing import List, Optional, Tuple
+
+import numpy as np
 
 from intcode import Computer
+from intcode_batch import run_batch
+from intcode_symbolic import SymbolicError, solve_affine
 from runner import run
 
 
@@ -166,13 +171,42 @@ def passes(noun: int, verb: int, program: List[int]) -> bool:
     return result == 19690720
 
 
+def search(program: List[int]) -> Optional[Tuple[int, int]]:
+    """Try the nouns and verbs in order, returning the first that passes."""
+    return next((pair for pair in product(range(100), repeat=2)
+                 if passes(*pair, program)), None)
+
+
+def search_batch(program: List[int]) -> List[Tuple[int, int]]:
+    """
+    Try all nouns and verbs at once, returning the pairs that pass. If a
+    value doesn't fit into 64 bits, try them in order instead.
+    """
+    pairs = list(product(range(100), repeat=2))
+    try:
+        memory, _ = run_batch(program, [{1: noun, 2: verb}
+                                        for noun, verb in pairs])
+    except OverflowError:
+        pair = search(program)
+        if pair is None:
+            return []
+        return [pair]
+    return [pairs[lane] for lane in np.flatnonzero(memory[:, 0] == 19690720)]
+
+
 def main2():
-    """Try all noun, verb pairs from 0 to 99."""
-    inp = read_input()
-    for noun in range(100):
-        for verb in range(100):
-            if passes(noun, verb, inp):
-                print(100 * noun + verb)
+    """
+    Solve for the noun and verb with one symbolic run. If the result isn't
+    affine in them, try all pairs at once.
+    """
+    program = read_input()
+    try:
+        pairs = solve_affine(program, {1: range(100), 2: range(100)}, 0,
+                             19690720)
+    except SymbolicError:
+        pairs = search_batch(program)
+    for noun, verb in pairs:
+        print(100 * noun + verb)
 
 
 if __name__ == '__main__':
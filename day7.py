@@ -133,48 +133,70 @@ What is the highest signal that can be sent to the thrusters?
 """
 
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 from itertools import permutations
+from math import factorial
+import os
 
-from intcode import Computer
+from intcode import Computer, load_program
+from intcode_memo import Memo
 from runner import run
 
+WORKER_PROGRAM = None
+AMPLIFIERS = Memo(factory=lambda *args: Computer(*args))
 
-def test_combination(phase_settings, program):
-    """Evaluate the program chain using the given phase settings."""
-    inp_values = None
-    inp_pos = 1
-
-    def inp():
-        """
-        Alternate between returning either the current phase setting,
-        or the input.
-        """
-        nonlocal inp_pos
-        inp_pos = (inp_pos + 1) % 2
-        return inp_values[inp_pos]
-
-    chan = []
-
-    def out(value):
-        """Append to chan."""
-        chan.append(value)
-        return False
 
+def init_worker(program):
+    """Keep the program in the worker process, so it is sent only once."""
+    global WORKER_PROGRAM
+    WORKER_PROGRAM = program
+
+
+def test_in_worker(test, phase_settings):
+    """Run ``test`` on the program kept by ``init_worker``."""
+    return test(phase_settings, WORKER_PROGRAM)
+
+
+def search(test, program, phases, workers=1):
+    """
+    Return the highest signal ``test`` reaches for any permutation of
+    ``phases``.
+    :param workers: The number of worker processes, or None for one per
+                    CPU. With 1, or if no process pool can be started, the
+                    search is serial.
+    """
+    candidates = permutations(phases)
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        chunksize = max(1, factorial(len(phases)) // (4 * workers))
+        try:
+            with ProcessPoolExecutor(workers, initializer=init_worker,
+                                     initargs=(program,)) as pool:
+                return max(pool.map(partial(test_in_worker, test),
+                                    candidates, chunksize=chunksize))
+        except (OSError, BrokenProcessPool):
+            candidates = permutations(phases)
+    return max(test(settings, program) for settings in candidates)
+
+
+def test_combination(phase_settings, program):
+    """
+    Evaluate the program chain using the given phase settings. Amplifier
+    runs are memoized, as permutations share their prefixes.
+    """
     output = 0
     for setting in phase_settings:
-        inp_values = (setting, output)
-        computer = Computer(program, inp, out)
-        computer.evaluate()
-        output = chan[0]
-        chan = []
+        [output] = AMPLIFIERS.run(program, inputs=(setting, output)).outputs
     return output
 
 
 def main1():
     """Test all phase settings."""
-    program = [int(x) for x in open("day7-input").read().split(",")]
-    print(max(test_combination(settings, program) for settings in
-              permutations(range(5))))
+    program = load_program("day7-input")
+    AMPLIFIERS.clear()
+    print(search(test_combination, program, range(5)))
 
 
 def test_configuration(phase_settings, program):
@@ -214,9 +236,8 @@ def test_configuration(phase_settings, program):
 
 def main2():
     """Try all possible settings."""
-    program = [int(n) for n in open("day7-input").read().split(",")]
-    print(max(test_configuration(setting, program) for setting in
-              permutations([5, 6, 7, 8, 9])))
+    program = Computer("day7-input").snapshot()
+    print(search(test_configuration, program, [5, 6, 7, 8, 9]))
 
 
 if __name__ == '__main__':
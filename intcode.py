@@ -1,7 +1,338 @@
 """The IntCode computer."""
 
+import hashlib
 import os
-from typing import Callable, Union, Sequence
+import stat
+import sys
+import tempfile
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict, deque
+from enum import Enum
+from importlib import import_module
+from itertools import product
+from typing import Any, Callable, Dict, Generator, Iterable, List, \
+    NamedTuple, Optional, Tuple, Union, Sequence
+
+from intcode_memory import MEMORY_BACKENDS, NumpyMemory, OverlayMemory
+
+
+LENGTHS = {1: 4, 2: 4, 3: 2, 4: 2, 5: 3, 6: 3, 7: 4, 8: 4, 9: 2, 99: 1}
+
+
+WRITES = {1: 3, 2: 3, 3: 1, 7: 3, 8: 3}
+
+
+def build_decode_table() -> Dict[int, Tuple[int, Tuple[int, int, int]]]:
+    """
+    Map every legal instruction word to its opcode and parameter modes.
+    Unused parameters must have mode 0, and written parameters can't be
+    immediate.
+    """
+    table = {}
+    for opcode, length in LENGTHS.items():
+        for modes in product((0, 1, 2), repeat=length - 1):
+            written = WRITES.get(opcode)
+            if written and modes[written - 1] == 1:
+                continue
+            number = opcode + sum(mode * 10 ** (i + 2)
+                                  for i, mode in enumerate(modes))
+            table[number] = opcode, modes + (0,) * (4 - length)
+    return table
+
+
+DECODE_TABLE = build_decode_table()
+
+
+def decode(number: int) -> Tuple[int, Tuple[int, int, int]]:
+    """
+    Split an instruction word into its opcode and parameter modes.
+    :raise ValueError: For unknown opcodes and illegal modes.
+    """
+    try:
+        return DECODE_TABLE[number]
+    except KeyError:
+        if number % 100 in LENGTHS:
+            raise ValueError(f"illegal modes: {number}") from None
+        raise ValueError(f"unexpected input: {number}") from None
+
+
+COMPARE_BRANCH = {75, 76, 85, 86}
+ADD_SELF = 11
+
+
+def find_fusions(memory) -> Tuple[Dict[int, tuple], Dict[int, int]]:
+    """
+    Find instruction pairs in ``memory`` that ``Computer.evaluate`` can run
+    as one superinstruction:
+    - A compare (7, 8) writing to a cell in position mode, directly followed
+      by a branch (5, 6) testing that cell. The fused opcode is the two
+      opcodes' digits, e.g. 75, and the modes are the compare's, then 0 for
+      the branch's word and test, then the branch target's.
+    - An add of an immediate value to a cell, storing the sum back into the
+      same cell (``1001 x k x`` and ``101 k x x``, also relative). The fused
+      opcode is ``ADD_SELF`` with the position of the constant appended to
+      the modes.
+    :return: The fused instructions by address, for ``Computer.decoded``,
+             and the address of the fused instruction depending on each
+             other cell whose value the fusion relies on.
+    """
+    get = memory.get
+    end = 1 + max((addr for addr, _ in memory.items()), default=-1)
+    fused = {}
+    cells = {}
+    addr = 0
+    while addr < end:
+        try:
+            opcode, modes = decode(get(addr, 0))
+        except ValueError:
+            addr += 1
+            continue
+        length = LENGTHS[opcode]
+        if opcode in (7, 8) and modes[2] == 0:
+            target = get(addr + 3, 0)
+            try:
+                branch, branch_modes = decode(get(addr + 4, 0))
+            except ValueError:
+                branch = None
+            if branch in (5, 6) and branch_modes[0] == 0 \
+                    and get(addr + 5, 0) == target \
+                    and not addr <= target < addr + 7:
+                fused[addr] = (10 * opcode + branch,
+                               modes + (0, 0, branch_modes[1]))
+                for cell in (addr + 3, addr + 4, addr + 5):
+                    cells[cell] = addr
+                length = 7
+        elif opcode == 1 and modes[2] != 1 and 1 in modes[:2]:
+            constant = modes.index(1) + 1
+            cell = addr + 3 - constant
+            if modes[cell - addr - 1] == modes[2] \
+                    and get(cell, 0) == get(addr + 3, 0):
+                fused[addr] = (ADD_SELF, modes + (constant,))
+                cells[cell] = cells[addr + 3] = addr
+        addr += length
+    return fused, cells
+
+
+class InputRequired(Exception):
+    """Raised by an input source that has no value available yet."""
+
+
+class Status(Enum):
+    """Why ``Computer.evaluate`` returned."""
+    HALTED = "halted"
+    YIELDED = "yielded"
+    BLOCKED = "blocked"
+    BUDGET = "budget"
+
+
+PROGRAM_CACHE_SIZE = 64
+PROGRAM_CACHE: "OrderedDict[tuple, Tuple[int, ...]]" = OrderedDict()
+DISK_CACHE_DIR = os.environ.get("INTCODE_CACHE_DIR")
+SCAN_CACHE: "OrderedDict[tuple, Any]" = OrderedDict()
+
+
+def program_hash(program: Union[Sequence[int], str]) -> str:
+    """Return a content hash of a program string or a parsed tape."""
+    if not isinstance(program, str):
+        program = ",".join(str(n) for n in program)
+    return hashlib.sha1(program.strip().encode()).hexdigest()
+
+
+def cached_program(key: tuple, parse: Callable[[], Tuple[int, ...]]
+                   ) -> Tuple[int, ...]:
+    """
+    Look ``key`` up in the LRU program cache, calling ``parse`` on a miss.
+    """
+    try:
+        PROGRAM_CACHE.move_to_end(key)
+        return PROGRAM_CACHE[key]
+    except KeyError:
+        program = PROGRAM_CACHE[key] = parse()
+        if len(PROGRAM_CACHE) > PROGRAM_CACHE_SIZE:
+            PROGRAM_CACHE.popitem(last=False)
+        return program
+
+
+def cached_scan(scan: Callable[[dict], Any], image: Sequence[int]) -> Any:
+    """
+    Return ``scan(memory)`` for the memory of a freshly loaded program,
+    from an LRU cache keyed by the scan and the program's contents.
+    """
+    key = scan, tuple(image)
+    try:
+        SCAN_CACHE.move_to_end(key)
+        return SCAN_CACHE[key]
+    except KeyError:
+        result = SCAN_CACHE[key] = scan(dict(enumerate(image)))
+        if len(SCAN_CACHE) > PROGRAM_CACHE_SIZE:
+            SCAN_CACHE.popitem(last=False)
+        return result
+
+
+def parse_program(text: str) -> Tuple[int, ...]:
+    """Parse a program string."""
+    return tuple(int(n) for n in text.split(","))
+
+
+def write_atomic(path: str, data: bytes):
+    """
+    Write a file by renaming a complete temporary file over it, so that
+    concurrent readers never see a partial file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def read_program_file(path: str, status: os.stat_result,
+                      cache_dir: Optional[str]) -> Tuple[int, ...]:
+    """
+    Parse a program file. If ``cache_dir`` is set, the parsed program is
+    kept there as raw 64 bit integers after the number of cells, keyed by
+    path, size and mtime, and read from there next time. Cache files that
+    don't hold that many cells are parsed and written again.
+    """
+    if cache_dir is None:
+        with open(path) as file:
+            return parse_program(file.read())
+    key = f"{os.path.abspath(path)}:{status.st_size}:{status.st_mtime_ns}"
+    cache_file = os.path.join(
+        cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".bin")
+    cells = array("q")
+    try:
+        with open(cache_file, "rb") as file:
+            cells.frombytes(file.read())
+    except (OSError, ValueError):
+        pass
+    else:
+        if cells and cells[0] == len(cells) - 1:
+            return tuple(cells[1:])
+    with open(path) as file:
+        program = parse_program(file.read())
+    try:
+        cells = array("q", [len(program)] + list(program))
+    except OverflowError:
+        return program
+    write_atomic(cache_file, cells.tobytes())
+    return program
+
+
+def load_program(tape: Union[Sequence[int], str],
+                 cache_dir: Optional[str] = None) -> Sequence[int]:
+    """
+    Parse an input file or a program string, or return a parsed tape.
+    Parsed programs are immutable and cached in process, by path and mtime
+    for files and by content hash for program strings.
+    :param cache_dir: Directory for an additional on-disk cache of parsed
+                      program files. Defaults to ``$INTCODE_CACHE_DIR``.
+    """
+    if not isinstance(tape, str):
+        return tape
+    try:
+        status = os.stat(tape)
+    except (OSError, ValueError):
+        status = None
+    if status is not None and stat.S_ISREG(status.st_mode):
+        return cached_program(
+            ("file", os.path.abspath(tape), status.st_mtime_ns),
+            lambda: read_program_file(tape, status,
+                                      cache_dir or DISK_CACHE_DIR))
+    return cached_program(("text", program_hash(tape)),
+                          lambda: parse_program(tape))
+
+
+BACKENDS = {
+    "interpreter": "intcode:Computer",
+    "threaded": "intcode_threaded:ThreadedComputer",
+    "compiled": "intcode_compiler:CompiledComputer",
+    "loops": "intcode_loops:LoopComputer",
+}
+
+
+def get_backend(name: str) -> type:
+    """
+    Return the ``Computer`` subclass registered in ``BACKENDS`` as
+    ``module:class``, importing its module on first use.
+    :raise ValueError: If no backend of that name is registered.
+    """
+    try:
+        module, cls = BACKENDS[name].split(":")
+    except KeyError:
+        raise ValueError(f"unknown backend: {name}") from None
+    return getattr(import_module(module), cls)
+
+
+class Snapshot(NamedTuple):
+    """
+    The state of a Computer. Pass it to the ``Computer`` constructor to get
+    a copy-on-write fork. ``image`` is shared by all forks, ``overlay``
+    holds the cells written on top of it and must not be mutated.
+    For ``NumpyMemory``, ``image`` is a copy of the memory instead, which
+    every fork copies again.
+    """
+    image: Union[Tuple[int, ...], NumpyMemory]
+    overlay: Dict[int, int]
+    iptr: int
+    base: int
+    opcode: Optional[int]
+    modes: Optional[Tuple[int, int, int]]
+
+
+class Instrument(ABC):
+    """
+    Base class of tools that shadow methods of one computer instance, such
+    as ``intcode_profile.Profile``. Other computers keep running the plain
+    methods. Subclasses return the replacements from ``self.instrument``.
+    Superinstructions are turned off while attached, so the tools see the
+    instructions of the program.
+    """
+
+    def __init__(self):
+        self.computer: Optional["Computer"] = None
+        self.shadowed: Dict[str, Optional[Callable]] = {}
+        self.fusing = False
+
+    @abstractmethod
+    def instrument(self, computer: "Computer") -> Dict[str, Callable]:
+        """Return the instrumented methods of ``computer`` by name."""
+
+    def attach(self, computer: "Computer"):
+        """Start instrumenting ``computer``."""
+        if self.computer is not None:
+            raise ValueError(
+                f"{type(self).__name__.lower()} is already attached")
+        methods = self.instrument(computer)
+        self.shadowed = {name: computer.__dict__.get(name)
+                         for name in methods}
+        for name, method in methods.items():
+            setattr(computer, name, method)
+        self.fusing = computer.fusing or bool(computer.fused)
+        computer.fusing = False
+        for addr in set(computer.fused.values()):
+            computer.decoded.pop(addr, None)
+        computer.fused.clear()
+        self.computer = computer
+
+    def detach(self):
+        """
+        Stop instrumenting, restoring the computer's previous methods.
+        Superinstructions are found again when it next evaluates.
+        """
+        for name, method in self.shadowed.items():
+            if method is None:
+                delattr(self.computer, name)
+            else:
+                setattr(self.computer, name, method)
+        self.computer.fusing = self.fusing
+        self.computer = None
 
 
 class Computer:
@@ -9,34 +340,105 @@ class Computer:
     An IntCode Computer supporting opcodes 1-8, 99.
     """
 
-    def __init__(self, tape: Union[Sequence[int], str],
+    def __new__(cls, *args, backend: str = None, **kwargs):
+        """
+        Create an instance of ``backend``, see ``get_backend``.
+        :raise ValueError: If a subclass is given a backend.
+        """
+        if backend is not None:
+            if cls is not Computer:
+                raise ValueError(f"{cls.__name__} can't select a backend")
+            cls = get_backend(backend)
+        return super().__new__(cls)
+
+    def __init__(self, tape: Union[Sequence[int], str, Snapshot],
                  inp: Callable[[], int] = None,
-                 out: Callable[[int], bool] = None):
+                 out: Callable[[int], bool] = None,
+                 memory: str = "dict", fuse: bool = False,
+                 immutable_code: bool = False, backend: str = None):
         """
         Initialize the Computer without running it yet.
-        :param tape: Input file, a program string or the parsed program.
+        :param tape: Input file, a program string, the parsed program or a
+                     snapshot to resume from.
         :param inp: Source for input values.
         :param out: Sink for output. May return true if the computation should
                     yield.
+        :param memory: The memory backend, one of ``MEMORY_BACKENDS``.
+        :param fuse: Run common instruction pairs as superinstructions, see
+                     ``find_fusions``. The program is scanned when first
+                     evaluated, so memory changes from outside must be
+                     made before that. On the puzzles, this gains at
+                     most about 1-2%, on the long runs of days 9 and 13,
+                     and makes shorter runs slower: day 11 and the day 2
+                     search by about 20%.
+        :param immutable_code: Don't check writes against the decode cache.
+                               Only safe for programs that never write into
+                               their code, see ``intcode_analysis``.
+        :param backend: The execution engine, one of ``BACKENDS``. The
+                        computer is an instance of its class.
         """
-        if isinstance(tape, str):
-            if os.path.isfile(tape):
-                tape = open(tape).read()
-            self.memory = {ix: int(n) for ix, n in enumerate(tape.split(","))}
-        else:
-            self.memory = dict(enumerate(tape))
-        self.iptr = 0
         self.inp = inp
         self.out = out
+        self.decoded = {}
+        self.fused = {}
+        self.fusing = fuse
+        self.steps = 0
+        self.image = None
+        if immutable_code:
+            self.write = self.write_data
+        if isinstance(tape, Snapshot):
+            if isinstance(tape.image, NumpyMemory):
+                self.memory = tape.image.copy()
+                for addr, value in tape.overlay.items():
+                    self.memory[addr] = value
+            else:
+                self.memory = OverlayMemory(tape.image, dict(tape.overlay))
+            self.iptr = tape.iptr
+            self.opcode = tape.opcode
+            self.modes = tape.modes
+            self.base = tape.base
+            return
+        self.image = load_program(tape)
+        self.memory = MEMORY_BACKENDS[memory](self.image)
+        self.iptr = 0
         self.opcode = None
         self.modes = None
         self.base = 0
 
+    def fuse(self):
+        """
+        Put the superinstructions of ``find_fusions`` into the cache. The
+        scan of a loaded program is cached by its contents, and fusions at
+        or relying on cells changed since loading are dropped again.
+        """
+        if self.image is None:
+            fused, cells = find_fusions(self.memory)
+        else:
+            fused, cells = cached_scan(find_fusions, self.image)
+        self.decoded.update(fused)
+        self.fused.update(cells)
+        if self.image is not None:
+            image = self.image
+            for addr, value in self.memory.items():
+                if addr >= len(image) or value != image[addr]:
+                    self.decoded.pop(addr, None)
+                    if addr in self.fused:
+                        self.decoded.pop(self.fused.pop(addr), None)
+
     def fetch(self):
-        """Update opcode and operation modes."""
-        number = self.memory[self.iptr]
-        self.opcode = number % 100
-        self.modes = tuple(number // 10**i % 10 for i in (2, 3, 4))
+        """
+        Update opcode and operation modes.
+        Decoded instructions are cached by address, see ``self.write``.
+        """
+        try:
+            self.opcode, self.modes = self.decoded[self.iptr]
+        except KeyError:
+            self.opcode, self.modes = self.decode_at(self.iptr)
+
+    def decode_at(self, addr: int) -> Tuple[int, Tuple[int, int, int]]:
+        """Decode the instruction at ``addr`` on a cache miss, and cache it."""
+        decoded = self.decoded[addr] = decode(self.memory[addr])
+        return decoded
 
     def get_address(self, offset):
         """Calculate the address for ``self.read`` and ``self.write``."""
@@ -57,63 +459,208 @@ class Computer:
         :return: The value either at an address.
         """
         addr = self.get_address(offset)
-        return self.memory[addr] if addr in self.memory else 0
+        return self.memory.get(addr, 0)
 
     def write(self, offset, value):
-        """Dually to ``self.read``, write a value according to mode."""
+        """
+        Dually to ``self.read``, write a value according to mode.
+        Writing to a decoded instruction, or to a cell a superinstruction
+        relies on, drops it from the cache, so self-modifying programs keep
+        working.
+        """
         addr = self.get_address(offset)
         self.memory[addr] = value
+        if addr in self.decoded:
+            del self.decoded[addr]
+        if addr in self.fused:
+            self.decoded.pop(self.fused.pop(addr), None)
 
-    def evaluate(self) -> None:
+    def write_data(self, offset, value):
+        """Like ``self.write``, for code that is never written to."""
+        self.memory[self.get_address(offset)] = value
+
+    def evaluate(self, max_steps: Optional[int] = None) -> Status:
         """
         Start processing the program until either the HALT code (99) is
-        reached, or the program yields after having written to ``self.out``.
-        """
-        self.fetch()
-        while self.opcode != 99:
-            if self.opcode == 1:
-                arg1 = self.read(1)
-                arg2 = self.read(2)
-                self.write(3, arg1 + arg2)
-                self.iptr += 4
-            elif self.opcode == 2:
-                arg1 = self.read(1)
-                arg2 = self.read(2)
-                self.write(3, arg1 * arg2)
-                self.iptr += 4
-            elif self.opcode == 3:
-                arg1 = self.inp()
-                self.write(1, arg1)
-                self.iptr += 2
-            elif self.opcode == 4:
-                arg1 = self.read(1)
-                should_yield = self.out(arg1)
-                self.iptr += 2
-                if should_yield:
-                    return
-            elif self.opcode == 5:
-                arg1 = self.read(1)
-                self.iptr = self.read(2) if arg1 != 0 else self.iptr + 3
-            elif self.opcode == 6:
-                arg1 = self.read(1)
-                self.iptr = self.read(2) if arg1 == 0 else self.iptr + 3
-            elif self.opcode == 7:
-                arg1 = self.read(1)
-                arg2 = self.read(2)
-                self.write(3, 1 if arg1 < arg2 else 0)
-                self.iptr += 4
-            elif self.opcode == 8:
-                arg1 = self.read(1)
-                arg2 = self.read(2)
-                self.write(3, 1 if arg1 == arg2 else 0)
-                self.iptr += 4
-            elif self.opcode == 9:
-                arg1 = self.read(1)
-                self.base += arg1
-                self.iptr += 2
-            else:
-                raise ValueError(f"unexpected input: {self.memory[self.iptr]}")
+        reached, the program yields after having written to ``self.out``,
+        ``self.inp`` raises ``InputRequired``, or ``max_steps`` instructions
+        have been executed. Executed instructions are added to
+        ``self.steps``. A superinstruction counts as two; if only one fits
+        into the budget, just its first instruction is run.
+        """
+        if self.fusing:
+            self.fusing = False
+            self.fuse()
+        budget = sys.maxsize if max_steps is None else max_steps
+        steps = 0
+        try:
             self.fetch()
+            while self.opcode != 99:
+                if steps >= budget:
+                    return Status.BUDGET
+                steps += 1
+                if self.opcode == 1:
+                    arg1 = self.read(1)
+                    arg2 = self.read(2)
+                    self.write(3, arg1 + arg2)
+                    self.iptr += 4
+                elif self.opcode == 2:
+                    arg1 = self.read(1)
+                    arg2 = self.read(2)
+                    self.write(3, arg1 * arg2)
+                    self.iptr += 4
+                elif self.opcode == 3:
+                    arg1 = self.inp()
+                    self.write(1, arg1)
+                    self.iptr += 2
+                elif self.opcode == 4:
+                    arg1 = self.read(1)
+                    should_yield = self.out(arg1)
+                    self.iptr += 2
+                    if should_yield:
+                        return Status.YIELDED
+                elif self.opcode == 5:
+                    arg1 = self.read(1)
+                    self.iptr = self.read(2) if arg1 != 0 else self.iptr + 3
+                elif self.opcode == 6:
+                    arg1 = self.read(1)
+                    self.iptr = self.read(2) if arg1 == 0 else self.iptr + 3
+                elif self.opcode == 7:
+                    arg1 = self.read(1)
+                    arg2 = self.read(2)
+                    self.write(3, 1 if arg1 < arg2 else 0)
+                    self.iptr += 4
+                elif self.opcode == 8:
+                    arg1 = self.read(1)
+                    arg2 = self.read(2)
+                    self.write(3, 1 if arg1 == arg2 else 0)
+                    self.iptr += 4
+                elif self.opcode == 9:
+                    arg1 = self.read(1)
+                    self.base += arg1
+                    self.iptr += 2
+                elif self.opcode in COMPARE_BRANCH:
+                    arg1 = self.read(1)
+                    arg2 = self.read(2)
+                    result = arg1 < arg2 if self.opcode < 80 else arg1 == arg2
+                    self.write(3, 1 if result else 0)
+                    if steps >= budget:
+                        self.iptr += 4
+                        return Status.BUDGET
+                    steps += 1
+                    if result == (self.opcode % 10 == 5):
+                        self.iptr = self.read(6)
+                    else:
+                        self.iptr += 7
+                elif self.opcode == ADD_SELF:
+                    arg1 = self.memory[self.iptr + self.modes[3]]
+                    self.write(3, self.read(3) + arg1)
+                    self.iptr += 4
+                else:
+                    raise ValueError(
+                        f"unexpected input: {self.memory[self.iptr]}")
+                self.fetch()
+            return Status.HALTED
+        except InputRequired:
+            steps -= 1
+            return Status.BLOCKED
+        finally:
+            self.steps += steps
+
+    def snapshot(self) -> Snapshot:
+        """
+        Return the current state. This only copies the written cells if the
+        memory is already copy-on-write, as for forks, and copies the array
+        of a ``NumpyMemory``. Otherwise the whole memory is copied once.
+        """
+        if isinstance(self.memory, NumpyMemory):
+            return Snapshot(self.memory.copy(), {}, self.iptr, self.base,
+                            self.opcode, self.modes)
+        memory = OverlayMemory.freeze(self.memory)
+        return Snapshot(memory.image, memory.overlay, self.iptr, self.base,
+                        self.opcode, self.modes)
+
+    def fork(self, inp: Callable[[], int] = None,
+             out: Callable[[int], bool] = None) -> "Computer":
+        """Return a copy-on-write copy of this computer with new I/O."""
+        return type(self)(self.snapshot(), inp, out)
+
+    def run(self) -> Generator[Optional[int], Optional[int], None]:
+        """
+        Run the program as a generator, which yields every output value and
+        yields None whenever the program waits for input. Values sent into
+        the generator are queued as input.
+        This replaces ``self.inp`` and ``self.out``.
+        """
+        pending = deque()
+        outputs = deque()
+
+        def inp():
+            """Take the next queued input."""
+            if not pending:
+                raise InputRequired
+            return pending.popleft()
+
+        def out(value):
+            """Hand the value to the generator and yield."""
+            outputs.append(value)
+            return True
+
+        self.inp, self.out = inp, out
+        while not self.has_halted():
+            blocked = self.evaluate() is Status.BLOCKED
+            while outputs:
+                sent = yield outputs.popleft()
+                if sent is not None:
+                    pending.append(sent)
+            while blocked and not pending:
+                sent = yield None
+                if sent is not None:
+                    pending.append(sent)
+
+    def run_until_input(self, inputs: Iterable[int] = ()) -> List[int]:
+        """
+        Feed the given inputs to the program, run it until it needs more
+        input or halts, and return the values it has output.
+        """
+        pending = deque(inputs)
+        outputs = []
+
+        def inp():
+            """Take the next given input."""
+            if not pending:
+                raise InputRequired
+            return pending.popleft()
+
+        def out(value):
+            """Collect the value without yielding."""
+            outputs.append(value)
+            return False
+
+        previous = self.inp, self.out
+        self.inp, self.out = inp, out
+        try:
+            self.evaluate()
+        finally:
+            self.inp, self.out = previous
+        return outputs
+
+    def profile(self):
+        """Start profiling, and return the ``intcode_profile.Profile``."""
+        from intcode_profile import Profile
+        profile = Profile()
+        profile.attach(self)
+        return profile
+
+    def trace(self, size: int = 1000):
+        """
+        Start recording the last ``size`` executed instructions, and return
+        the ``intcode_trace.Trace``.
+        """
+        from intcode_trace import Trace
+        trace = Trace(size)
+        trace.attach(self)
+        return trace
 
     def has_halted(self):
         """Return whether the HALT code has already been encountered."""
@@ -0,0 +1,234 @@
+"""
+Code and data segmentation of IntCode programs.
+
+``analyze`` builds a control-flow graph from the tape by following the
+instructions reachable from address 0, and tags the cells they occupy as
+code and all other cells as data. Jumps through a position or relative
+mode target can't be followed statically. Their targets are guessed from
+the constants the program stores with immediate adds and multiplies, which
+is how return addresses are pushed. Targets computed any other way are
+missed, so with unresolved jumps, code is under-approximated: the cells a
+``Monitor`` sees executed may be many more. Writes in relative mode, or
+through an address the program writes to itself, can't be resolved either.
+Only programs without any of them, and without writes to the instruction
+words, can be proven not to modify their instructions, which is what
+decode caches rely on (operands are read from memory when executed, and
+may be patched).
+
+A ``Monitor`` watches a running computer instead, and counts the writes to
+cells that have been executed before or are tagged as code.
+"""
+
+import importlib
+from collections import Counter
+from time import perf_counter
+from typing import Callable, Dict, List, Set, Tuple
+
+from texttable import Texttable
+
+from intcode import ADD_SELF, COMPARE_BRANCH, Computer, Instrument, \
+    LENGTHS, WRITES, decode, load_program
+from runner import run, run_with
+
+
+class Analysis:
+    """The static analysis of a program, see ``analyze``."""
+
+    def __init__(self, program):
+        self.program = program
+        self.instructions: Dict[int, Tuple[int, Tuple[int, int, int]]] = {}
+        self.edges: Dict[int, Tuple[int, ...]] = {}
+        self.code: Set[int] = set()
+        self.invalid: Set[int] = set()
+        self.writes: Set[int] = set()
+        self.unresolved_jumps: Set[int] = set()
+        self.unresolved_writes: Set[int] = set()
+
+    @property
+    def data(self) -> Set[int]:
+        """The cells of the program not tagged as code."""
+        return set(range(len(self.program))) - self.code
+
+    @property
+    def code_writes(self) -> Set[int]:
+        """The code cells written at statically known addresses."""
+        return self.writes & self.code
+
+    @property
+    def word_writes(self) -> Set[int]:
+        """
+        The instruction words written at statically known addresses,
+        including reachable cells that are no instruction (yet).
+        """
+        return self.writes & (set(self.instructions) | self.invalid)
+
+    def proven_pure(self) -> bool:
+        """Return whether the program can't write to instruction words."""
+        return not (self.word_writes or self.invalid
+                    or self.unresolved_jumps or self.unresolved_writes)
+
+
+def analyze(tape) -> Analysis:
+    """Build the control-flow graph of a program and tag its cells."""
+    program = load_program(tape)
+    analysis = Analysis(program)
+
+    def cell(addr):
+        """Return the program's value at ``addr``, 0 beyond its end."""
+        return program[addr] if 0 <= addr < len(program) else 0
+
+    pending = [0]
+    constants = set()
+    while pending:
+        addr = pending.pop()
+        if addr in analysis.instructions or not 0 <= addr < len(program):
+            continue
+        try:
+            opcode, modes = decode(program[addr])
+        except ValueError:
+            analysis.invalid.add(addr)
+            analysis.code.add(addr)
+            continue
+        length = LENGTHS[opcode]
+        analysis.instructions[addr] = opcode, modes
+        analysis.code.update(range(addr, addr + length))
+        if opcode == 99:
+            successors = ()
+        elif opcode in (5, 6):
+            successors = (addr + length,)
+            if modes[1] == 1:
+                successors += (cell(addr + 2),)
+            else:
+                analysis.unresolved_jumps.add(addr)
+        else:
+            successors = (addr + length,)
+        if opcode in WRITES:
+            offset = WRITES[opcode]
+            if modes[offset - 1] == 0:
+                analysis.writes.add(cell(addr + offset))
+            else:
+                analysis.unresolved_writes.add(addr)
+            if opcode in (1, 2) and modes[:2] == (1, 1):
+                first, second = cell(addr + 1), cell(addr + 2)
+                constants.add(first + second if opcode == 1
+                              else first * second)
+        analysis.edges[addr] = successors
+        pending.extend(successors)
+        if not pending and analysis.unresolved_jumps:
+            pending.extend(constants - set(analysis.instructions))
+            constants.clear()
+    for addr, (opcode, modes) in analysis.instructions.items():
+        offset = WRITES.get(opcode)
+        if offset and modes[offset - 1] == 0 \
+                and addr + offset in analysis.writes:
+            analysis.unresolved_writes.add(addr)
+    return analysis
+
+
+class Monitor(Instrument):
+    """
+    Record the cells a computer executes and writes, and count the writes
+    into code: cells executed before, or in ``code``, e.g. the code of an
+    ``Analysis``. Like ``intcode_profile``, this needs the interpreter.
+    """
+
+    def __init__(self, code: Set[int] = frozenset()):
+        self.code = set(code)
+        self.executed: Set[int] = set()
+        self.words: Set[int] = set()
+        self.written: Set[int] = set()
+        self.code_writes: Counter = Counter()
+        self.word_writes: Counter = Counter()
+        super().__init__()
+
+    def instrument(self, computer: Computer) -> Dict[str, Callable]:
+        """Return the monitored methods of ``computer``."""
+        fetch = computer.fetch
+        write = computer.write
+        executed = self.executed
+        words = self.words
+
+        def monitored_fetch():
+            """Fetch, then record the instruction's cells."""
+            fetch()
+            opcode = computer.opcode
+            if opcode in COMPARE_BRANCH:
+                length = 7
+            elif opcode == ADD_SELF:
+                length = 4
+            else:
+                length = LENGTHS[opcode]
+            words.add(computer.iptr)
+            executed.update(range(computer.iptr, computer.iptr + length))
+
+        def monitored_write(offset, value):
+            """Write, then record the cell and check it for code."""
+            addr = computer.get_address(offset)
+            write(offset, value)
+            self.written.add(addr)
+            if addr in executed or addr in self.code:
+                self.code_writes[addr] += 1
+            if addr in words:
+                self.word_writes[addr] += 1
+
+        return {"fetch": monitored_fetch, "write": monitored_write}
+
+
+def survey() -> Texttable:
+    """
+    Analyze the intcode inputs statically, then monitor the runs of both
+    parts of the puzzles. The dynamic counts (executed cells, and writes to
+    code and to instruction words) are summed over the computers the puzzle
+    modules create.
+    """
+    table = Texttable(max_width=0)
+    table.set_cols_dtype(["t"] + ["i"] * 6 + ["t"] + ["i"] * 3)
+    table.header(["input", "instructions", "code", "data", "word writes",
+                  "unresolved jumps", "unresolved writes", "proven pure",
+                  "executed", "code writes", "word writes"])
+    for day in (2, 5, 7, 9, 11, 13):
+        path = f"day{day}-input"
+        analysis = analyze(path)
+        module = importlib.import_module(f"day{day}")
+        monitors: List[Monitor] = []
+
+        def factory(*args, **kwargs):
+            """Create a computer with a monitor attached."""
+            computer = Computer(*args, **kwargs)
+            monitors.append(Monitor(analysis.code))
+            monitors[-1].attach(computer)
+            return computer
+
+        run_with(module, factory)
+        table.add_row([
+            path, len(analysis.instructions), len(analysis.code),
+            len(analysis.data), len(analysis.word_writes),
+            len(analysis.unresolved_jumps), len(analysis.unresolved_writes),
+            "yes" if analysis.proven_pure() else "no",
+            len(set().union(*(m.executed for m in monitors))),
+            sum(sum(m.code_writes.values()) for m in monitors),
+            sum(sum(m.word_writes.values()) for m in monitors)])
+    return table
+
+
+def main1():
+    """Print the code and data survey of the intcode inputs."""
+    print(survey().draw())
+
+
+def main2():
+    """
+    Time the BOOST program of day 9, which doesn't write to instruction
+    words, with and without checking writes against the decode cache.
+    """
+    for immutable_code in (False, True):
+        computer = Computer("day9-input", lambda: 2, lambda value: False,
+                            immutable_code=immutable_code)
+        start = perf_counter()
+        computer.evaluate()
+        print(f"immutable_code={immutable_code}: "
+              f"{perf_counter() - start:.3f}s")
+
+
+if __name__ == '__main__':
+    run(main1, main2)
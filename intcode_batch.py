@@ -0,0 +1,156 @@
+"""
+Run many copies of one IntCode program in lockstep with NumPy.
+
+The lanes share the program, but may differ in memory patches and inputs.
+Memory is an ``int64`` matrix with one row per lane. In every round, the
+running lanes are grouped by instruction pointer and instruction word, and
+each group is advanced by one vectorized step. Lanes whose control flow
+diverges end up in different groups, and merge again when their
+instruction pointers agree.
+"""
+
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from intcode import LENGTHS, decode, load_program
+
+INT64_MIN = np.iinfo(np.int64).min
+
+
+class Batch:
+    """Lockstep execution of many lanes, see ``run_batch``."""
+
+    def __init__(self, tape: Union[Sequence[int], str],
+                 patches: Sequence[Dict[int, int]],
+                 inputs: Sequence[Sequence[int]] = None,
+                 memory_size: int = 0):
+        program = load_program(tape)
+        n_lanes = len(patches)
+        size = max([len(program), memory_size] +
+                   [addr + 1 for patch in patches for addr in patch])
+        self.memory = np.zeros((n_lanes, size), dtype=np.int64)
+        self.memory[:, :len(program)] = program
+        for lane, patch in enumerate(patches):
+            for addr, value in patch.items():
+                self.memory[lane, addr] = value
+        self.iptr = np.zeros(n_lanes, dtype=np.int64)
+        self.base = np.zeros(n_lanes, dtype=np.int64)
+        self.running = np.ones(n_lanes, dtype=np.bool_)
+        self.inputs = [list(values) for values in inputs] if inputs \
+            else [[] for _ in range(n_lanes)]
+        self.outputs: List[List[int]] = [[] for _ in range(n_lanes)]
+
+    def load(self, lanes: np.ndarray, addrs: np.ndarray) -> np.ndarray:
+        """Read one address per lane, 0 beyond the end of memory."""
+        if (addrs < 0).any():
+            raise ValueError(f"negative address in lanes {lanes[addrs < 0]}")
+        inside = addrs < self.memory.shape[1]
+        if inside.all():
+            return self.memory[lanes, addrs]
+        values = np.zeros(len(lanes), dtype=np.int64)
+        values[inside] = self.memory[lanes[inside], addrs[inside]]
+        return values
+
+    def store(self, lanes: np.ndarray, addrs: np.ndarray, values: np.ndarray):
+        """Write one address per lane, growing the memory if needed."""
+        if (addrs < 0).any():
+            raise ValueError(f"negative address in lanes {lanes[addrs < 0]}")
+        size = self.memory.shape[1]
+        needed = int(addrs.max()) + 1
+        if needed > size:
+            grown = np.zeros((len(self.memory), max(needed, 2 * size)),
+                             dtype=np.int64)
+            grown[:, :size] = self.memory
+            self.memory = grown
+        self.memory[lanes, addrs] = values
+
+    def address(self, lanes: np.ndarray, iptr: int, offset: int, mode: int):
+        """Calculate the parameter address for every lane."""
+        if mode == 1:
+            return np.full(len(lanes), iptr + offset, dtype=np.int64)
+        addrs = self.load(lanes, np.full(len(lanes), iptr + offset))
+        return addrs if mode == 0 else addrs + self.base[lanes]
+
+    def read(self, lanes: np.ndarray, iptr: int, offset: int, mode: int):
+        """Read a parameter for every lane."""
+        return self.load(lanes, self.address(lanes, iptr, offset, mode))
+
+    def step(self, lanes: np.ndarray, iptr: int, number: int):
+        """Execute the instruction ``number`` at ``iptr`` for all lanes."""
+        opcode, modes = decode(number)
+        if opcode == 99:
+            self.running[lanes] = False
+            return
+        nxt = iptr + LENGTHS[opcode]
+        if opcode in (1, 2, 7, 8):
+            arg1 = self.read(lanes, iptr, 1, modes[0])
+            arg2 = self.read(lanes, iptr, 2, modes[1])
+            if opcode == 1:
+                result = arg1 + arg2
+                overflow = ((arg1 ^ result) & (arg2 ^ result)) < 0
+            elif opcode == 2:
+                result = arg1 * arg2
+                nonzero = arg1 != 0
+                overflow = nonzero & (
+                    result // np.where(nonzero, arg1, 1) != arg2) | (
+                    (arg1 == -1) & (arg2 == INT64_MIN))
+            else:
+                result = (arg1 < arg2 if opcode == 7 else arg1 == arg2
+                          ).astype(np.int64)
+                overflow = None
+            if overflow is not None and overflow.any():
+                raise OverflowError(f"lanes {lanes[overflow]} overflowed "
+                                    f"64 bits at address {iptr}")
+            self.store(lanes, self.address(lanes, iptr, 3, modes[2]), result)
+        elif opcode == 3:
+            try:
+                values = [self.inputs[lane].pop(0) for lane in lanes]
+            except IndexError:
+                raise ValueError(f"lanes {lanes} ran out of input at "
+                                 f"address {iptr}") from None
+            self.store(lanes, self.address(lanes, iptr, 1, modes[0]),
+                       np.array(values, dtype=np.int64))
+        elif opcode == 4:
+            for lane, value in zip(lanes, self.read(lanes, iptr, 1,
+                                                    modes[0])):
+                self.outputs[lane].append(int(value))
+        elif opcode in (5, 6):
+            arg1 = self.read(lanes, iptr, 1, modes[0])
+            jump = arg1 != 0 if opcode == 5 else arg1 == 0
+            target = self.read(lanes, iptr, 2, modes[1])
+            self.iptr[lanes] = np.where(jump, target, nxt)
+            return
+        else:
+            self.base[lanes] += self.read(lanes, iptr, 1, modes[0])
+        self.iptr[lanes] = nxt
+
+    def run(self):
+        """Advance all lanes until every one of them has halted."""
+        while self.running.any():
+            active = np.flatnonzero(self.running)
+            pointers = self.iptr[active]
+            for iptr in np.unique(pointers):
+                lanes = active[pointers == iptr]
+                words = self.load(lanes, np.full(len(lanes), iptr))
+                for number in np.unique(words):
+                    self.step(lanes[words == number], int(iptr), int(number))
+
+
+def run_batch(tape: Union[Sequence[int], str],
+              patches: Sequence[Dict[int, int]],
+              inputs: Sequence[Sequence[int]] = None,
+              memory_size: int = 0) -> Tuple[np.ndarray, List[List[int]]]:
+    """
+    Run one lane of the program per entry in ``patches`` until all halt.
+    :param tape: Input file, a program string or the parsed program.
+    :param patches: For every lane, the memory cells to set before running.
+    :param inputs: For every lane, the input values.
+    :param memory_size: The number of memory cells to start with. Memory
+                        grows on demand, but this avoids repeated copying.
+    :return: The final memory, one row per lane (padded with zeros), and
+             the outputs of each lane.
+    """
+    batch = Batch(tape, patches, inputs, memory_size)
+    batch.run()
+    return batch.memory, batch.outputs
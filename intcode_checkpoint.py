@@ -0,0 +1,162 @@
+"""
+Binary checkpoints and warm starts for the IntCode computer.
+
+A checkpoint holds a computer's registers, its memory as an image and an
+overlay (see ``intcode.Snapshot``), and the values it has output so far.
+Cells are stored as raw 64 bit integers, or as decimal text if a value does
+not fit.
+
+``WarmStart`` caches the checkpoint of a program run until it first needs
+more input than it was given, keyed by program hash, memory patches and the
+inputs. Programs with a long prologue, such as drawing the day 13 board,
+resume from there instead of running it again.
+"""
+
+import hashlib
+import io
+import os
+import struct
+from array import array
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Dict, List, Sequence, Tuple, Union
+
+from intcode import Computer, Snapshot, load_program, program_hash, \
+    write_atomic
+
+MAGIC = b"ICP1"
+HEADER = struct.Struct("<4sqqq")
+SECTION = struct.Struct("<cQ")
+
+
+def write_cells(file: BinaryIO, values: Sequence[int]):
+    """Write a section of integers."""
+    cells = array("q")
+    try:
+        cells.fromlist(list(values))
+    except OverflowError:
+        text = ",".join(str(value) for value in values).encode()
+        file.write(SECTION.pack(b"t", len(text)))
+        file.write(text)
+    else:
+        file.write(SECTION.pack(b"q", len(cells)))
+        file.write(cells.tobytes())
+
+
+def read_exactly(file: BinaryIO, size: int) -> bytes:
+    """
+    Read ``size`` bytes.
+    :raise ValueError: If the file ends before.
+    """
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError("truncated intcode checkpoint")
+    return data
+
+
+def read_cells(file: BinaryIO) -> List[int]:
+    """Read a section written by ``write_cells``."""
+    kind, count = SECTION.unpack(read_exactly(file, SECTION.size))
+    if kind == b"t":
+        text = read_exactly(file, count).decode()
+        return [int(value) for value in text.split(",")] if text else []
+    cells = array("q")
+    cells.frombytes(read_exactly(file, count * cells.itemsize))
+    return cells.tolist()
+
+
+def save_checkpoint(file: BinaryIO, snapshot: Snapshot,
+                    outputs: Sequence[int] = ()):
+    """Write a snapshot and the outputs made before it."""
+    opcode = -1 if snapshot.opcode is None else snapshot.opcode
+    file.write(HEADER.pack(MAGIC, snapshot.iptr, snapshot.base, opcode))
+    write_cells(file, snapshot.modes or ())
+    write_cells(file, snapshot.image)
+    write_cells(file, list(snapshot.overlay))
+    write_cells(file, list(snapshot.overlay.values()))
+    write_cells(file, outputs)
+
+
+def load_checkpoint(file: BinaryIO) -> Tuple[Snapshot, List[int]]:
+    """
+    Read a checkpoint written by ``save_checkpoint``.
+    :raise ValueError: If the file is not a checkpoint, or is truncated.
+    """
+    magic, iptr, base, opcode = HEADER.unpack(read_exactly(file,
+                                                           HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"not an intcode checkpoint: {magic!r}")
+    modes = tuple(read_cells(file)) or None
+    image = tuple(read_cells(file))
+    overlay = dict(zip(read_cells(file), read_cells(file)))
+    outputs = read_cells(file)
+    return Snapshot(image, overlay, iptr, base,
+                    None if opcode == -1 else opcode, modes), outputs
+
+
+class WarmStart:
+    """
+    Checkpoints of runs until input, kept in process and, if ``cache_dir``
+    is set, as files there.
+    :param factory: Creates the computers, e.g. an execution engine class.
+    :param maxsize: The number of checkpoints to keep in process, the least
+                    recently used are dropped.
+    """
+
+    def __init__(self, cache_dir: str = None,
+                 factory: Callable[..., Computer] = Computer,
+                 maxsize: int = 64):
+        self.cache_dir = cache_dir
+        self.factory = factory
+        self.maxsize = maxsize
+        self.checkpoints: "OrderedDict[str, Tuple[Snapshot, List[int]]]" = \
+            OrderedDict()
+
+    def key(self, program: Sequence[int], patches: Dict[int, int],
+            inputs: Sequence[int]) -> str:
+        """Return the cache key of a run."""
+        text = f"{program_hash(program)}:{sorted(patches.items())}:" \
+               f"{list(inputs)}"
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def keep(self, key: str, checkpoint: Tuple[Snapshot, List[int]]):
+        """Keep a checkpoint in process, dropping the least recently used."""
+        self.checkpoints[key] = checkpoint
+        if len(self.checkpoints) > self.maxsize:
+            self.checkpoints.popitem(last=False)
+
+    def start(self, tape: Union[Sequence[int], str],
+              patches: Dict[int, int] = None,
+              inputs: Sequence[int] = ()) -> Tuple[Computer, List[int]]:
+        """
+        Return a computer that has been fed ``inputs`` after applying the
+        memory patches, and has run until it needs more input or halted,
+        and the values it has output. Repeated starts restore a checkpoint.
+        Checkpoint files are replaced atomically, and unreadable ones are
+        written again.
+        """
+        program = load_program(tape)
+        patches = patches or {}
+        key = self.key(program, patches, inputs)
+        path = self.cache_dir and os.path.join(self.cache_dir, key + ".icp")
+        if key not in self.checkpoints and path and os.path.exists(path):
+            try:
+                with open(path, "rb") as file:
+                    self.keep(key, load_checkpoint(file))
+            except (OSError, ValueError):
+                pass
+        if key in self.checkpoints:
+            self.checkpoints.move_to_end(key)
+            snapshot, outputs = self.checkpoints[key]
+            return self.factory(snapshot), list(outputs)
+
+        computer = self.factory(program)
+        for addr, value in patches.items():
+            computer.memory[addr] = value
+        outputs = computer.run_until_input(inputs)
+        checkpoint = computer.snapshot(), list(outputs)
+        self.keep(key, checkpoint)
+        if path:
+            file = io.BytesIO()
+            save_checkpoint(file, *checkpoint)
+            write_atomic(path, file.getvalue())
+        return computer, outputs
@@ -0,0 +1,276 @@
+"""
+A transpiler from IntCode to Python, compiling one basic block at a time.
+
+A basic block starts at an executed address and ends after a jump (5, 6),
+after an output (4), or before an input (3) or a HALT (99). Its
+instructions are emitted as Python source with immediate operands and
+position-mode addresses folded in as constants, and compiled once into a
+function returning the next address.
+Operand cells the program has written to before, or that the block writes
+to itself, are volatile: they are read from memory when the block runs
+instead of being folded in, so that programs indexing memory by patching
+their own operands don't cause a recompilation per write.
+"""
+
+from functools import lru_cache
+import sys
+from typing import AbstractSet, Callable, Dict, List, Optional, Set, Tuple
+
+from intcode import Computer, InputRequired, LENGTHS, Status, decode
+
+BINARY = {1: "{} + {}", 2: "{} * {}", 7: "1 if {} < {} else 0",
+          8: "1 if {} == {} else 0"}
+
+
+class _Yield(Exception):
+    """Raised by an output block if the computation should yield."""
+
+
+def scan_block(memory, start: int, volatile: AbstractSet[int]
+               ) -> Tuple[List[Tuple[int, int, Tuple[int, int, int]]],
+                          Set[int]]:
+    """
+    Return the instructions (address, opcode, modes) of the basic block at
+    ``start`` and the cells the block writes to at statically known
+    addresses. The block is cut before an instruction it overwrites itself,
+    and before an input, so that a block raising ``InputRequired`` can be
+    run again from its start. An invalid instruction ends the block, or
+    raises ``ValueError`` if it would start it.
+    """
+    instructions = []
+    targets = set()
+    addr = start
+    while addr not in targets:
+        try:
+            opcode, modes = decode(memory.get(addr, 0))
+        except ValueError:
+            if instructions:
+                break
+            raise
+        if opcode == 99 or opcode == 3 and instructions:
+            break
+        instructions.append((addr, opcode, modes))
+        if opcode in (1, 2, 3, 7, 8):
+            offset = 1 if opcode == 3 else 3
+            if modes[offset - 1] == 0 \
+                    and addr + offset not in volatile | targets:
+                targets.add(memory.get(addr + offset, 0))
+        addr += LENGTHS[opcode]
+        if opcode in (4, 5, 6):
+            break
+    return instructions, targets
+
+
+def block_source(memory, start: int, volatile: AbstractSet[int] = frozenset()
+                 ) -> Tuple[str, List[int], int]:
+    """
+    Return the Python source of the basic block at ``start``, defining a
+    function ``block``, the cells whose values were folded into it, and its
+    number of instructions.
+    Cells in ``volatile``, and operand cells the block writes to itself, are
+    read when the block runs instead.
+    The source refers to the names ``m`` (memory), ``get`` (``m.get``),
+    ``rb`` (the relative base cell), ``n`` (the executed instructions
+    cell), ``c`` (the computer), ``owners`` and ``invalidate`` (see
+    ``CompiledComputer``), and ``_Yield``.
+    """
+    instructions, targets = scan_block(memory, start, volatile)
+    if not instructions:
+        return "", [], 0
+    volatile = volatile | targets
+    lines = ["def block():", "    b = rb[0]"]
+    folded = []
+
+    def operand(offset):
+        """Return an expression for the raw value of a parameter."""
+        cell = addr + offset
+        if cell in volatile:
+            return f"get({cell}, 0)"
+        folded.append(cell)
+        return repr(memory.get(cell, 0))
+
+    def param(offset, mode):
+        """Return an expression for reading a parameter."""
+        value = operand(offset)
+        if mode == 0:
+            return f"get({value}, 0)"
+        if mode == 1:
+            return value
+        return f"get({value} + b, 0)"
+
+    def store(offset, mode, expression):
+        """Emit a write, leaving the block if it hits compiled code."""
+        if mode == 0 and addr + offset not in volatile:
+            target = operand(offset)
+        else:
+            relative = " + b" if mode else ""
+            lines.append(f"    t = {operand(offset)}{relative}")
+            target = "t"
+        lines.extend([f"    m[{target}] = {expression}",
+                      f"    if {target} in owners:",
+                      f"        invalidate({target})",
+                      f"        n[0] += {count}",
+                      f"        return {nxt}"])
+
+    for count, (addr, opcode, modes) in enumerate(instructions, 1):
+        folded.append(addr)
+        nxt = addr + LENGTHS[opcode]
+        if opcode in BINARY:
+            arg1, arg2 = param(1, modes[0]), param(2, modes[1])
+            expression = BINARY[opcode].format(arg1, arg2)
+            if modes[0] == modes[1] == 1 and addr + 1 not in volatile \
+                    and addr + 2 not in volatile:
+                expression = repr(eval(expression))
+            store(3, modes[2], expression)
+        elif opcode == 3:
+            lines.append("    value = c.inp()")
+            store(1, modes[0], "value")
+        elif opcode == 4:
+            lines.extend([f"    if c.out({param(1, modes[0])}):",
+                          f"        n[0] += {count}",
+                          f"        raise _Yield({nxt})"])
+        elif opcode in (5, 6):
+            test = "!=" if opcode == 5 else "=="
+            lines.append(f"    n[0] += {count}")
+            lines.append(f"    return {param(2, modes[1])} "
+                         f"if {param(1, modes[0])} {test} 0 else {nxt}")
+        else:
+            lines.extend([f"    b += {param(1, modes[0])}",
+                          "    rb[0] = b"])
+    if opcode not in (5, 6):
+        lines.extend([f"    n[0] += {count}", f"    return {nxt}"])
+    return "\n".join(lines), folded, count
+
+
+@lru_cache(maxsize=4096)
+def compile_block(source: str):
+    """Compile block source, shared by all computers running the program."""
+    return compile(source, "<intcode block>", "exec")
+
+
+class CompiledComputer(Computer):
+    """
+    An IntCode Computer that runs compiled basic blocks. The constructor is
+    the same as ``Computer``'s.
+    Blocks are compiled when their start address is first executed, and are
+    dropped when the program writes to a cell folded into them.
+    Memory changes from outside should be done before calling
+    ``self.evaluate``, or be followed by ``self.invalidate``.
+    The instructions that remain of a budget when the next block does not
+    fit into it anymore are run by the interpreter.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.blocks: Dict[int, Callable[[], int]] = {}
+        self.sizes: Dict[int, int] = {}
+        self.owners: Dict[int, Set[int]] = {}
+        self.folded: Dict[int, List[int]] = {}
+        self.volatile: Set[int] = set()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def base(self):
+        """The relative base, kept in a cell shared with the blocks."""
+        return self.rb[0]
+
+    @base.setter
+    def base(self, value):
+        try:
+            self.rb[0] = value
+        except AttributeError:
+            self.rb = [value]
+
+    @property
+    def steps(self):
+        """The executed instructions, kept in a cell shared with the blocks."""
+        return self.n[0]
+
+    @steps.setter
+    def steps(self, value):
+        try:
+            self.n[0] = value
+        except AttributeError:
+            self.n = [value]
+
+    def write(self, offset, value):
+        """Write like the interpreter, dropping blocks using the cell."""
+        addr = self.get_address(offset)
+        super().write(offset, value)
+        if addr in self.owners:
+            self.invalidate(addr)
+
+    def invalidate(self, addr):
+        """
+        Drop all blocks the given address was folded into, and don't fold it
+        into operands anymore.
+        """
+        self.volatile.add(addr)
+        for start in self.owners.pop(addr, ()):
+            del self.blocks[start]
+            del self.sizes[start]
+            for cell in self.folded.pop(start):
+                if cell != addr:
+                    self.owners[cell].discard(start)
+
+    def compile(self, start):
+        """
+        Compile and register the basic block at ``start``.
+        Return None on the HALT code.
+        """
+        source, folded, size = block_source(self.memory, start,
+                                            self.volatile)
+        if not source:
+            return None
+        namespace = {"m": self.memory, "get": self.memory.get, "rb": self.rb,
+                     "n": self.n, "c": self, "owners": self.owners,
+                     "invalidate": self.invalidate, "_Yield": _Yield}
+        exec(compile_block(source), namespace)
+        block = self.blocks[start] = namespace["block"]
+        self.sizes[start] = size
+        self.folded[start] = folded
+        for cell in folded:
+            self.owners.setdefault(cell, set()).add(start)
+        return block
+
+    def evaluate(self, max_steps: Optional[int] = None) -> Status:
+        """
+        Start processing the program until either the HALT code (99) is
+        reached, the program yields after having written to ``self.out``,
+        ``self.inp`` raises ``InputRequired``, or ``max_steps`` instructions
+        have been executed. Executed instructions are added to
+        ``self.steps``.
+        """
+        blocks = self.blocks
+        sizes = self.sizes
+        n = self.n
+        budget = sys.maxsize if max_steps is None else n[0] + max_steps
+        ip = self.iptr
+        try:
+            while True:
+                try:
+                    if max_steps is None:
+                        while True:
+                            ip = blocks[ip]()
+                    while n[0] + sizes[ip] <= budget:
+                        ip = blocks[ip]()
+                except KeyError:
+                    if ip in blocks:
+                        raise
+                    if self.compile(ip) is None:
+                        self.opcode = 99
+                        return Status.HALTED
+                    continue
+                self.iptr = ip
+                self.decoded.clear()
+                try:
+                    return super().evaluate(budget - n[0])
+                finally:
+                    ip = self.iptr
+        except _Yield as signal:
+            ip = signal.args[0]
+            self.opcode = 4
+            return Status.YIELDED
+        except InputRequired:
+            return Status.BLOCKED
+        finally:
+            self.iptr = ip
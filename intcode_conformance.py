@@ -0,0 +1,133 @@
+"""
+Conformance of the IntCode execution engines.
+
+Every engine in ``intcode.BACKENDS`` runs the example programs of day 9,
+both parts of the intcode puzzles and the serial search of day 2, and is
+compared with the interpreter: the values output, and the final memory,
+registers and instruction count of every computer created. An engine is
+safe to use where all of them match. Run as a module, this exits with
+status 1 on any mismatch.
+"""
+
+import importlib
+import sys
+from functools import partial
+from typing import Callable, List, Sequence, Tuple
+
+from texttable import Texttable
+
+from intcode import BACKENDS, Computer
+from runner import run, run_with
+
+EXAMPLES = {
+    "quine": [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006,
+              101, 0, 99],
+    "16 digits": [1102, 34915192, 34915192, 7, 4, 7, 99, 0],
+    "large number": [104, 1125899906842624, 99],
+}
+EXPECTED = {
+    "quine": EXAMPLES["quine"],
+    "16 digits": [1219070632396864],
+    "large number": [1125899906842624],
+}
+PUZZLES = (2, 5, 7, 9, 11, 13)
+MISMATCHES: List[str] = []
+
+State = Tuple[dict, int, int, int]
+
+
+def state(computer: Computer) -> State:
+    """Return the non-zero memory, registers and instruction count."""
+    return ({addr: value for addr, value in computer.memory.items() if value},
+            computer.iptr, computer.base, computer.steps)
+
+
+def run_example(program: List[int], backend: str
+                ) -> Tuple[List[int], List[State]]:
+    """Run an example program without input."""
+    computer = Computer(program, backend=backend)
+    outputs = computer.run_until_input()
+    return outputs, [state(computer)]
+
+
+def day2_search():
+    """
+    Print the result of the serial search of day 2, which its part 2 only
+    falls back on if the batch search overflows.
+    """
+    day2 = importlib.import_module("day2")
+    print(day2.search(day2.read_input()))
+
+
+def run_puzzle(day: int, backend: str,
+               mains: Sequence[Callable[[], None]] = None
+               ) -> Tuple[str, List[State]]:
+    """
+    Run the main functions of a puzzle, both parts by default, with
+    computers of ``backend``, and return what they print and the final state
+    of each computer.
+    """
+    module = importlib.import_module(f"day{day}")
+    computers = []
+
+    def factory(*args, **kwargs):
+        """Create a computer of the backend and keep it."""
+        computer = Computer(*args, backend=backend, **kwargs)
+        computers.append(computer)
+        return computer
+
+    output = run_with(module, factory, mains)
+    return output, [state(computer) for computer in computers]
+
+
+def conformance(puzzles: bool) -> Texttable:
+    """
+    Compare every backend with the interpreter, on the examples or on the
+    puzzles, and add the mismatches to ``MISMATCHES``. Example outputs are
+    compared with the expected ones instead.
+    """
+    table = Texttable(max_width=0)
+    table.set_cols_dtype(["t", "t", "i", "t", "t", "t"])
+    table.header(["backend", "program", "computers", "outputs",
+                  "memory and registers", "steps"])
+    if puzzles:
+        cases = [(f"day{day}", partial(run_puzzle, day)) for day in PUZZLES]
+        cases.append(("day2 search",
+                      partial(run_puzzle, 2, mains=[day2_search])))
+    else:
+        cases = [(name, partial(run_example, program))
+                 for name, program in EXAMPLES.items()]
+    for name, case in cases:
+        output, states = case("interpreter")
+        if not puzzles:
+            output = EXPECTED[name]
+        for backend in BACKENDS:
+            backend_output, backend_states = case(backend)
+            checks = {
+                "outputs": output == backend_output,
+                "memory and registers": [s[:3] for s in states]
+                == [s[:3] for s in backend_states],
+                "steps": [s[3] for s in states]
+                == [s[3] for s in backend_states]}
+            MISMATCHES.extend(f"{backend} {name}: {check}"
+                              for check, same in checks.items() if not same)
+            table.add_row([backend, name, len(backend_states)]
+                          + ["same" if same else "DIFFERENT"
+                             for same in checks.values()])
+    return table
+
+
+def main1():
+    """Check the backends on the examples of day 9."""
+    print(conformance(puzzles=False).draw())
+
+
+def main2():
+    """Check the backends on the intcode puzzles."""
+    print(conformance(puzzles=True).draw())
+
+
+if __name__ == '__main__':
+    run(main1, main2)
+    if MISMATCHES:
+        sys.exit("mismatches: " + ", ".join(MISMATCHES))
@@ -0,0 +1,160 @@
+"""
+Multi-process fleets of IntCode computers sharing one program image.
+
+A ``Fleet`` parses the program once and places it in a
+``multiprocessing.shared_memory`` block as 64 bit integers. Its worker
+processes attach to the block and view it through a ``memoryview`` without
+copying. Each job gets a computer whose memory is an ``OverlayMemory`` over
+that view, so only the cells the job writes are materialized in the worker.
+The fleet records how many jobs and instructions each worker ran, and for
+how long.
+"""
+
+import os
+from array import array
+from functools import partial
+from itertools import product
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, \
+    Sequence, Tuple, Union
+
+from texttable import Texttable
+
+from intcode import Computer, Snapshot, load_program
+from runner import run
+
+IMAGE = None
+
+
+def attach(name: str, length: int):
+    """Attach a worker process to the shared image."""
+    global IMAGE
+    block = SharedMemory(name)
+    IMAGE = block, block.buf.cast("q")[:length]
+
+
+def work(function: Callable[[Computer, Any], Any], backend: str, job
+         ) -> Tuple[int, Any, int, float]:
+    """
+    Run a job in a worker on a fresh computer over the shared image, and
+    return the worker's pid, the result, the instructions run and the time.
+    """
+    computer = Computer(Snapshot(IMAGE[1], {}, 0, 0, None, None),
+                        backend=backend)
+    start = perf_counter()
+    result = function(computer, job)
+    return os.getpid(), result, computer.steps, perf_counter() - start
+
+
+class Fleet:
+    """
+    Worker processes running jobs against a program in shared memory. Use
+    it as a context manager, which releases the processes and the block.
+    :param workers: The number of processes, by default one per CPU.
+    :param backend: The execution engine, one of ``intcode.BACKENDS``.
+    :raise ValueError: If a value of the program does not fit into 64 bits.
+    """
+
+    def __init__(self, tape: Union[Sequence[int], str], workers: int = None,
+                 backend: str = None):
+        program = load_program(tape)
+        try:
+            cells = array("q", program)
+        except OverflowError:
+            raise ValueError("program values must fit into 64 bits") \
+                from None
+        self.backend = backend
+        self.block = SharedMemory(create=True,
+                                  size=max(1, len(cells) * cells.itemsize))
+        self.block.buf[:len(cells) * cells.itemsize] = cells.tobytes()
+        self.pool = Pool(workers, attach, (self.block.name, len(cells)))
+        self.stats: Dict[int, List] = {}
+
+    def __enter__(self) -> "Fleet":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the workers and free the shared image."""
+        self.pool.terminate()
+        self.pool.join()
+        self.block.close()
+        self.block.unlink()
+
+    def map(self, function: Callable[[Computer, Any], Any], jobs: Iterable,
+            chunksize: int = 64) -> Iterator:
+        """
+        Call ``function(computer, job)`` in the workers for every job, with
+        a new computer each time, and yield the results in order.
+        ``function`` must be picklable, e.g. defined at module level.
+        """
+        for pid, result, steps, seconds in self.pool.imap(
+                partial(work, function, self.backend), jobs, chunksize):
+            stats = self.stats.setdefault(pid, [0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += steps
+            stats[2] += seconds
+            yield result
+
+    def throughput(self) -> Texttable:
+        """Report the jobs, instructions and instructions/s per worker."""
+        table = Texttable()
+        table.set_cols_dtype(["i", "i", "i", "f", "i"])
+        table.header(["worker", "jobs", "instructions", "seconds",
+                      "instructions/s"])
+        for pid, (jobs, steps, seconds) in sorted(self.stats.items()):
+            table.add_row([pid, jobs, steps, seconds,
+                           steps / seconds if seconds else 0])
+        return table
+
+
+def noun_verb(computer: Computer, job: Tuple[int, int]) -> int:
+    """Run the day 2 program with a noun and verb, returning cell 0."""
+    computer.memory[1], computer.memory[2] = job
+    computer.evaluate()
+    return computer.memory[0]
+
+
+def search(workers: int = None) -> Tuple[List[int], Fleet]:
+    """
+    Try all nouns and verbs of day 2 in a fleet, and return the answers for
+    19690720 and the fleet.
+    """
+    pairs = list(product(range(100), repeat=2))
+    with Fleet("day2-input", workers) as fleet:
+        results = list(fleet.map(noun_verb, pairs))
+    answers = [100 * noun + verb for (noun, verb), result
+               in zip(pairs, results) if result == 19690720]
+    return answers, fleet
+
+
+def main1():
+    """Search day 2 exhaustively, and print the throughput per worker."""
+    answers, fleet = search()
+    print(answers)
+    print(fleet.throughput().draw())
+
+
+def main2():
+    """Time the day 2 search with growing numbers of workers."""
+    table = Texttable()
+    table.set_cols_dtype(["i", "f", "f"])
+    table.header(["workers", "seconds", "speedup"])
+    baseline = None
+    workers = 1
+    while workers <= 2 * (os.cpu_count() or 1):
+        start = perf_counter()
+        search(workers)
+        seconds = perf_counter() - start
+        baseline = baseline or seconds
+        table.add_row([workers, seconds, baseline / seconds])
+        workers *= 2
+    print(table.draw())
+
+
+if __name__ == '__main__':
+    run(main1, main2)
@@ -0,0 +1,299 @@
+"""
+Summarization of counting loops for the IntCode computer.
+
+A counting loop is a straight-line block of adds, multiplies and compares,
+closed by a branch back to its start with an immediate target. One cell,
+the induction variable, is incremented by an invariant step, compared with
+an invariant bound, and the comparison decides the branch. Other cells may
+be incremented by invariant amounts (accumulators), or be computed from
+invariants, the induction variable, accumulators and cells computed before
+in the same iteration.
+
+When such a loop is entered, the number of iterations is solved for, all
+iterations but the last are skipped by advancing the induction variable
+and the accumulators in closed form, and the last iteration is run by the
+interpreter, which sets all other cells as if the loop had run completely.
+Run as a module, this checks ``LoopComputer`` against the interpreter on
+the intcode puzzles.
+"""
+
+import importlib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from texttable import Texttable
+
+from intcode import Computer, LENGTHS, Status, cached_scan, decode
+from runner import run, run_with
+
+Instruction = Tuple[int, int, Tuple[int, int, int]]
+
+
+class Loop(NamedTuple):
+    """A candidate counting loop found by ``find_loops``."""
+    head: int
+    end: int
+    words: Tuple[int, ...]
+    body: List[Instruction]
+    branch: Instruction
+
+
+def find_loops(memory) -> Dict[int, Loop]:
+    """
+    Find backward branches with an immediate target, whose body consists of
+    adds, multiplies and compares only, by loop head.
+    """
+    get = memory.get
+    end = 1 + max((addr for addr, _ in memory.items()), default=-1)
+    loops = {}
+    for addr in range(end):
+        try:
+            opcode, modes = decode(get(addr, 0))
+        except ValueError:
+            continue
+        head = get(addr + 2, 0)
+        if opcode not in (5, 6) or modes[1] != 1 or not 0 <= head < addr:
+            continue
+        body = []
+        cursor = head
+        while cursor < addr:
+            try:
+                body_opcode, body_modes = decode(get(cursor, 0))
+            except ValueError:
+                break
+            if body_opcode not in (1, 2, 7, 8):
+                break
+            body.append((cursor, body_opcode, body_modes))
+            cursor += LENGTHS[body_opcode]
+        if cursor == addr and body:
+            words = tuple(get(cell, 0) for cell in range(head, addr + 3))
+            loops[head] = Loop(head, addr + 3, words, body,
+                               (addr, opcode, modes))
+    return loops
+
+
+def exit_iteration(start: int, step: int, test: str, bound: int
+                   ) -> Optional[int]:
+    """
+    Return the first ``i`` for which ``start + step * i`` fails ``test``
+    against ``bound``, or None if it never does.
+    :param test: One of ``<``, ``<=``, ``>``, ``>=``, ``==`` and ``!=``.
+    """
+    if step < 0:
+        start, step, bound = -start, -step, -bound
+        test = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}.get(test, test)
+    if test == "<":
+        return max(0, -((start - bound) // step))
+    if test == "<=":
+        return max(0, (bound - start) // step + 1)
+    if test in (">", ">="):
+        holds = start > bound if test == ">" else start >= bound
+        return None if holds else 0
+    if test == "==":
+        return 1 if start == bound else 0
+    distance = bound - start
+    return distance // step if distance >= 0 and not distance % step \
+        else None
+
+
+class LoopComputer(Computer):
+    """
+    An IntCode Computer that skips the iterations of counting loops. The
+    constructor is the same as ``Computer``'s. Loops are found when the
+    program is first evaluated, and checked against memory and the
+    relative base whenever they are entered. The scan of a loaded program
+    is cached by its contents, so loops that changes made before the first
+    evaluation would create are not found. On short runs, creating the
+    computer still costs: the day 2 search, 3,893 runs without loops, is
+    about 15% slower than with the interpreter. Loop heads are never
+    cached by ``self.decode_at``, so only fetching them misses the decode
+    cache and looks for a loop.
+    Skipped instructions are added to ``self.steps``, but not counted
+    against the budget of ``self.evaluate``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.loops: Optional[Dict[int, Loop]] = None
+        self.summarized = 0
+        super().__init__(*args, **kwargs)
+
+    def evaluate(self, max_steps: Optional[int] = None) -> Status:
+        """
+        Find the loops, then evaluate like the interpreter. Without loops,
+        decoding is left to the interpreter.
+        """
+        if self.loops is None:
+            self.loops = find_loops(self.memory) if self.image is None \
+                else dict(cached_scan(find_loops, self.image))
+            if not self.loops:
+                self.decode_at = super().decode_at
+        return super().evaluate(max_steps)
+
+    def decode_at(self, addr: int) -> Tuple[int, Tuple[int, int, int]]:
+        """Summarize the loop starting at ``addr``, if any, then decode."""
+        if self.loops and addr in self.loops:
+            self.summarize(self.loops[addr])
+            if addr in self.loops:
+                return decode(self.memory[addr])
+        return super().decode_at(addr)
+
+    def resolve(self, addr: int, offset: int, mode: int) -> Tuple[str, int]:
+        """Return ("imm", value) or ("cell", address) for a parameter."""
+        value = self.memory.get(addr + offset, 0)
+        if mode == 1:
+            return "imm", value
+        return "cell", value + (self.base if mode == 2 else 0)
+
+    def summarize(self, loop: Loop):
+        """Skip all but the last iteration of ``loop``, if it counts."""
+        get = self.memory.get
+        if any(get(loop.head + i, 0) != word
+               for i, word in enumerate(loop.words)):
+            del self.loops[loop.head]
+            return
+        plan = self.plan(loop)
+        if plan is None:
+            return
+        skip, updates = plan
+        if skip <= 0:
+            return
+        for cell, step in updates:
+            self.memory[cell] = get(cell, 0) + step * skip
+            if cell in self.decoded:
+                del self.decoded[cell]
+            if cell in self.fused:
+                self.decoded.pop(self.fused.pop(cell), None)
+        self.steps += skip * (len(loop.body) + 1)
+        self.summarized += skip
+
+    def plan(self, loop: Loop
+             ) -> Optional[Tuple[int, List[Tuple[int, int]]]]:
+        """
+        Return the iterations to skip and the (cell, step) pairs of the
+        induction variable and the accumulators, or None if ``loop`` isn't
+        a counting loop in the current state.
+        """
+        get = self.memory.get
+        reads: List[List[Tuple[str, int]]] = []
+        targets: List[int] = []
+        for addr, opcode, modes in loop.body:
+            reads.append([self.resolve(addr, 1, modes[0]),
+                          self.resolve(addr, 2, modes[1])])
+            kind, target = self.resolve(addr, 3, modes[2])
+            if kind != "cell" or loop.head <= target < loop.end:
+                return None
+            targets.append(target)
+        if len(set(targets)) != len(targets):
+            return None
+        written = set(targets)
+
+        def invariant(operand):
+            """Return the value of an operand not written in the loop."""
+            kind, value = operand
+            if kind == "imm":
+                return value
+            return None if value in written else get(value, 0)
+
+        steps = {}
+        for (_, opcode, _), operands, target in zip(loop.body, reads,
+                                                    targets):
+            if opcode != 1:
+                continue
+            for own, other in (operands, operands[::-1]):
+                if own == ("cell", target) and invariant(other) is not None:
+                    steps[target] = invariant(other)
+        for index, ((_, opcode, _), operands) in enumerate(zip(loop.body,
+                                                               reads)):
+            for kind, cell in operands:
+                if kind == "cell" and cell in written and cell not in steps \
+                        and cell not in targets[:index]:
+                    return None
+
+        kind, tested = self.resolve(loop.branch[0], 1, loop.branch[2][0])
+        if kind != "cell" or tested not in written:
+            return None
+        index = targets.index(tested)
+        _, opcode, _ = loop.body[index]
+        if opcode not in (7, 8):
+            return None
+        (kind1, left), (kind2, right) = reads[index]
+        if kind1 == "cell" and left in steps and steps[left] \
+                and invariant((kind2, right)) is not None:
+            counter, bound = left, invariant((kind2, right))
+            test = "<" if opcode == 7 else "=="
+        elif kind2 == "cell" and right in steps and steps[right] \
+                and invariant((kind1, left)) is not None:
+            counter, bound = right, invariant((kind1, left))
+            test = ">" if opcode == 7 else "=="
+        else:
+            return None
+        if loop.branch[1] == 6:
+            test = {"<": ">=", ">": "<=", "==": "!="}[test]
+
+        step = steps[counter]
+        start = get(counter, 0)
+        if targets.index(counter) < index:
+            start += step
+        last = exit_iteration(start, step, test, bound)
+        if last is None:
+            return None
+        return last, list(steps.items())
+
+
+def differential() -> Texttable:
+    """
+    Run both parts of the intcode puzzles with the interpreter and with
+    ``LoopComputer``, and compare their printed results and the final
+    state and instruction count of every computer they create.
+    """
+    table = Texttable()
+    table.set_cols_dtype(["t", "i", "i", "i", "t"])
+    table.header(["puzzle", "computers", "loops", "skipped iterations",
+                  "same results"])
+    for day in (2, 5, 7, 9, 11, 13):
+        module = importlib.import_module(f"day{day}")
+        results = []
+        for factory in (Computer, LoopComputer):
+            computers = []
+
+            def record(*args, **kwargs):
+                """Create a computer and keep it for comparison."""
+                computer = factory(*args, **kwargs)
+                computers.append(computer)
+                return computer
+
+            output = run_with(module, record)
+            states = [(dict(computer.memory.items()), computer.iptr,
+                       computer.base, computer.opcode, computer.steps)
+                      for computer in computers]
+            results.append((output, states, computers))
+        (text, states, _), (loop_text, loop_states, computers) = results
+        table.add_row([
+            f"day{day}", len(computers),
+            sum(len(computer.loops or ()) for computer in computers),
+            sum(computer.summarized for computer in computers),
+            "yes" if (text, states) == (loop_text, loop_states) else "NO"])
+    return table
+
+
+def main1():
+    """Compare the loop summarization with the interpreter."""
+    print(differential().draw())
+
+
+def main2():
+    """Run a counting loop of ten million iterations."""
+    program = [1101, 0, 0, 100,        # i = 0
+               1101, 0, 0, 101,        # total = 0
+               1001, 100, 1, 100,      # loop: i += 1
+               1001, 101, 3, 101,      # total += 3
+               1007, 100, 10 ** 7, 102,  # t = i < 10 ** 7
+               1005, 102, 8,           # if t goto loop
+               4, 101, 99]
+    computer = LoopComputer(program, out=print)
+    computer.evaluate()
+    print(f"{computer.steps} instructions, "
+          f"{computer.summarized} iterations skipped")
+
+
+if __name__ == '__main__':
+    run(main1, main2)
@@ -0,0 +1,100 @@
+"""
+Memoization of pure IntCode runs.
+
+A run that starts from a program's initial state is a pure function of the
+program, the memory patches applied before running and the input values.
+``Memo`` caches the outputs and final state of such runs, with bounded LRU
+eviction.
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Sequence, Tuple, Union
+
+from intcode import Computer, Snapshot, load_program
+
+
+class RunResult(NamedTuple):
+    """
+    The outcome of a run. ``memory`` is shared between all callers getting
+    this result from the cache, and must not be modified.
+    """
+    outputs: Tuple[int, ...]
+    memory: object
+    halted: bool
+
+
+class CacheInfo(NamedTuple):
+    """Cache statistics, like ``functools.lru_cache``'s."""
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class Memo:
+    """
+    A bounded cache of runs, keyed by program contents, patches and inputs.
+    Runs that miss the cache fork a snapshot of the program's initial state.
+    :param maxsize: The number of runs, and of initial snapshots, to keep.
+    :param factory: Creates the computers, e.g. an execution engine class.
+    """
+
+    def __init__(self, maxsize: int = 1024,
+                 factory: Callable[..., Computer] = Computer):
+        self.maxsize = maxsize
+        self.factory = factory
+        self.results: "OrderedDict[tuple, RunResult]" = OrderedDict()
+        self.initial: "OrderedDict[Tuple[int, ...], Snapshot]" = \
+            OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def snapshot(self, program: Tuple[int, ...]) -> Snapshot:
+        """Return the initial state of a program, created once."""
+        try:
+            self.initial.move_to_end(program)
+        except KeyError:
+            self.initial[program] = self.factory(program).snapshot()
+            if len(self.initial) > self.maxsize:
+                self.initial.popitem(last=False)
+        return self.initial[program]
+
+    def run(self, tape: Union[Sequence[int], str],
+            patches: Dict[int, int] = None,
+            inputs: Sequence[int] = ()) -> RunResult:
+        """
+        Run the program with the given memory patches and inputs until it
+        halts or needs more input, or return the cached result of doing so.
+        """
+        program = tuple(load_program(tape))
+        patches = patches or {}
+        key = (program, tuple(sorted(patches.items())), tuple(inputs))
+        try:
+            self.results.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+        else:
+            self.hits += 1
+            return self.results[key]
+
+        computer = self.factory(self.snapshot(program))
+        for addr, value in patches.items():
+            computer.memory[addr] = value
+        outputs = computer.run_until_input(inputs)
+        result = RunResult(tuple(outputs), computer.memory,
+                           computer.has_halted())
+        self.results[key] = result
+        if len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+        return result
+
+    def info(self) -> CacheInfo:
+        """Return the hit and miss statistics."""
+        return CacheInfo(self.hits, self.misses, self.maxsize,
+                         len(self.results))
+
+    def clear(self):
+        """Empty the cache and reset the statistics."""
+        self.results.clear()
+        self.initial.clear()
+        self.hits = self.misses = 0
@@ -0,0 +1,248 @@
+"""Memory backends for the IntCode computer."""
+
+from array import array
+from itertools import repeat
+from typing import Iterable, Sequence
+
+
+def dict_memory(tape: Iterable[int]) -> dict:
+    """The default memory: a dict from addresses to values."""
+    return dict(enumerate(tape))
+
+
+class ContiguousMemory:
+    """
+    Memory stored as one growable block of cells, indexed by address.
+    Cells are kept in an ``array('q')`` until a value does not fit into
+    64 bits anymore, after which they are moved to a list of Python ints.
+    Reading beyond the end yields 0, writing beyond the end zero-fills the
+    gap. Negative addresses are rejected.
+    """
+
+    def __init__(self, tape: Iterable[int]):
+        tape = list(tape)
+        try:
+            self.cells = array("q", tape)
+        except OverflowError:
+            self.cells = tape
+
+    def get(self, addr, default=0):
+        """Return the value at ``addr``, or ``default`` beyond the end."""
+        if addr < 0:
+            raise IndexError(f"negative address: {addr}")
+        try:
+            return self.cells[addr]
+        except IndexError:
+            return default
+
+    def __getitem__(self, addr):
+        return self.get(addr)
+
+    def __setitem__(self, addr, value):
+        if addr < 0:
+            raise IndexError(f"negative address: {addr}")
+        try:
+            self.cells[addr] = value
+        except IndexError:
+            self.cells.extend(repeat(0, addr + 1 - len(self.cells)))
+            self[addr] = value
+        except OverflowError:
+            self.cells = self.cells.tolist()
+            self.cells[addr] = value
+
+    def __contains__(self, addr):
+        return 0 <= addr < len(self.cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def items(self):
+        """Return (address, value) pairs for all cells."""
+        return enumerate(self.cells)
+
+
+class OverlayMemory:
+    """
+    Copy-on-write memory: an immutable image that may be shared between
+    computers, and an overlay holding the cells written since.
+    Copying only copies the overlay.
+    """
+
+    def __init__(self, image: Sequence[int], overlay: dict = None):
+        self.image = image
+        self.overlay = {} if overlay is None else overlay
+
+    @classmethod
+    def freeze(cls, memory) -> "OverlayMemory":
+        """
+        Return an overlay memory with the same contents as ``memory``.
+        Unless ``memory`` is an overlay memory itself, its contents are
+        copied once into a new image.
+        """
+        if isinstance(memory, OverlayMemory):
+            return memory.copy()
+        cells = dict(memory.items())
+        size = 0
+        while size in cells:
+            size += 1
+        return cls(tuple(cells.pop(addr) for addr in range(size)), cells)
+
+    def copy(self) -> "OverlayMemory":
+        """Return a memory sharing the image, with a copy of the overlay."""
+        return OverlayMemory(self.image, dict(self.overlay))
+
+    def get(self, addr, default=0):
+        """Return the value at ``addr``, or ``default`` if never written."""
+        value = self.overlay.get(addr)
+        if value is not None:
+            return value
+        if 0 <= addr < len(self.image):
+            return self.image[addr]
+        return default
+
+    def __getitem__(self, addr):
+        return self.get(addr)
+
+    def __setitem__(self, addr, value):
+        self.overlay[addr] = value
+
+    def __contains__(self, addr):
+        return addr in self.overlay or 0 <= addr < len(self.image)
+
+    def items(self):
+        """Return (address, value) pairs for all cells."""
+        cells = dict(enumerate(self.image))
+        cells.update(self.overlay)
+        return cells.items()
+
+
+PAGE_BITS = 10
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+ZERO_PAGE = (0,) * PAGE_SIZE
+
+
+class PagedMemory:
+    """
+    Memory split into pages of ``PAGE_SIZE`` cells, kept in a dict by page
+    number. Pages are lists, allocated on the first non-zero write into
+    them, so the cells near the program are accessed like a list while far
+    addresses only cost a page each. Pages that were never written are read
+    from the shared ``ZERO_PAGE``.
+    """
+
+    def __init__(self, tape: Iterable[int]):
+        self.pages = {}
+        self.pages_allocated = 0
+        tape = list(tape)
+        for start in range(0, len(tape), PAGE_SIZE):
+            page = tape[start:start + PAGE_SIZE]
+            page.extend(repeat(0, PAGE_SIZE - len(page)))
+            self.pages[start >> PAGE_BITS] = page
+            self.pages_allocated += 1
+
+    def get(self, addr, default=0):
+        """
+        Return the value at ``addr``. Unwritten cells are 0, ``default`` is
+        only accepted for compatibility with ``dict.get``.
+        """
+        return self.pages.get(addr >> PAGE_BITS, ZERO_PAGE)[addr & PAGE_MASK]
+
+    def __getitem__(self, addr):
+        return self.pages.get(addr >> PAGE_BITS, ZERO_PAGE)[addr & PAGE_MASK]
+
+    def __setitem__(self, addr, value):
+        try:
+            self.pages[addr >> PAGE_BITS][addr & PAGE_MASK] = value
+        except KeyError:
+            if value:
+                page = self.pages[addr >> PAGE_BITS] = [0] * PAGE_SIZE
+                page[addr & PAGE_MASK] = value
+                self.pages_allocated += 1
+
+    def __contains__(self, addr):
+        return addr >> PAGE_BITS in self.pages
+
+    def items(self):
+        """Return (address, value) pairs for all cells of allocated pages."""
+        return ((index << PAGE_BITS | offset, value)
+                for index in sorted(self.pages)
+                for offset, value in enumerate(self.pages[index]))
+
+
+class NumpyMemory:
+    """
+    Memory stored in a NumPy array of 64 bit integers, which doubles in
+    size when written beyond its end. Values are read with ``item``, so the
+    computer only ever sees Python ints and can't overflow itself; when it
+    stores a value that does not fit into 64 bits, the array is converted to
+    Python ints (dtype object) for the rest of the run. Copies are array
+    copies. Negative addresses are rejected.
+    """
+
+    def __init__(self, tape: Iterable[int]):
+        import numpy as np
+        tape = list(tape)
+        self.size = len(tape)
+        try:
+            self.cells = np.array(tape, dtype=np.int64)
+        except OverflowError:
+            self.cells = np.array(tape, dtype=object)
+
+    @property
+    def promoted(self) -> bool:
+        """Whether the cells have been converted to Python ints."""
+        return self.cells.dtype == object
+
+    def copy(self) -> "NumpyMemory":
+        """Return a memory with a copy of the cells."""
+        memory = NumpyMemory(())
+        memory.cells = self.cells.copy()
+        memory.size = self.size
+        return memory
+
+    def get(self, addr, default=0):
+        """Return the value at ``addr``, or ``default`` beyond the end."""
+        if addr < 0:
+            raise IndexError(f"negative address: {addr}")
+        if addr < self.size:
+            return self.cells.item(addr)
+        return default
+
+    def __getitem__(self, addr):
+        return self.get(addr)
+
+    def __setitem__(self, addr, value):
+        if addr < 0:
+            raise IndexError(f"negative address: {addr}")
+        if addr >= self.size:
+            if addr >= len(self.cells):
+                self.cells.resize(max(addr + 1, 2 * len(self.cells)),
+                                  refcheck=False)
+            self.size = addr + 1
+        try:
+            self.cells[addr] = value
+        except OverflowError:
+            self.cells = self.cells.astype(object)
+            self.cells[addr] = value
+
+    def __contains__(self, addr):
+        return 0 <= addr < self.size
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self.cells[:self.size].tolist())
+
+    def items(self):
+        """Return (address, value) pairs for all cells."""
+        return enumerate(self)
+
+
+MEMORY_BACKENDS = {
+    "dict": dict_memory,
+    "contiguous": ContiguousMemory,
+    "paged": PagedMemory,
+    "numpy": NumpyMemory,
+}
@@ -0,0 +1,157 @@
+"""
+Networks of IntCode computers, run as asyncio tasks.
+
+Every machine is a task with an ``asyncio.Queue`` as its inbox. A machine
+runs until it needs input, hands its outputs to its links (or its router),
+and only then suspends on its inbox. Wiring is arbitrary: rings, chains,
+fan-out (several links from one machine) and routers that pick the
+destination per value.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from intcode import Computer
+
+Router = Callable[[List[int]], Iterable[Tuple[int, int]]]
+
+
+class Deadlock(RuntimeError):
+    """Raised when all running machines wait for input that can't come."""
+
+
+class Wiring(ABC):
+    """
+    The wiring of IntCode computers, shared by the ways to run them.
+    Add machines with ``self.add``, wire them with ``self.connect`` or
+    ``self.route`` and start them with ``self.run``. Subclasses put values
+    into inboxes with ``self.send``.
+    """
+
+    def __init__(self):
+        self.machines: List[Computer] = []
+        self.initial: List[List[int]] = []
+        self.links: List[List[int]] = []
+        self.routers: Dict[int, Router] = {}
+        self.outputs: List[List[int]] = []
+
+    @classmethod
+    def ring(cls, computers: Sequence[Computer],
+             inputs: Sequence[Sequence[int]] = ()) -> "Wiring":
+        """Connect each machine to the next, and the last one to the first."""
+        network = cls.chain(computers, inputs)
+        network.connect(len(computers) - 1, 0)
+        return network
+
+    @classmethod
+    def chain(cls, computers: Sequence[Computer],
+              inputs: Sequence[Sequence[int]] = ()) -> "Wiring":
+        """Connect each machine to the next."""
+        network = cls()
+        inputs = list(inputs) + [()] * (len(computers) - len(inputs))
+        for computer, initial in zip(computers, inputs):
+            network.add(computer, initial)
+        for index in range(len(computers) - 1):
+            network.connect(index, index + 1)
+        return network
+
+    def add(self, computer: Computer, inputs: Iterable[int] = ()) -> int:
+        """Add a machine with the given initial inputs, return its index."""
+        self.machines.append(computer)
+        self.initial.append(list(inputs))
+        self.links.append([])
+        self.outputs.append([])
+        return len(self.machines) - 1
+
+    def connect(self, source: int, destination: int):
+        """Send every output of ``source`` to ``destination`` as well."""
+        self.links[source].append(destination)
+
+    def route(self, source: int, router: Router):
+        """
+        Send the outputs of ``source`` wherever ``router`` says. The router
+        gets the outputs of one run until input, and returns pairs of
+        destination and value.
+        """
+        self.routers[source] = router
+
+    def deliver(self, source: int, values: List[int]):
+        """Record the outputs of ``source`` and put them into inboxes."""
+        self.outputs[source].extend(values)
+        if source in self.routers:
+            pairs = self.routers[source](values)
+        else:
+            pairs = ((destination, value) for value in values
+                     for destination in self.links[source])
+        for destination, value in pairs:
+            if not self.machines[destination].has_halted():
+                self.send(destination, value)
+
+    @abstractmethod
+    def send(self, destination: int, value: int):
+        """Put a value into the inbox of ``destination``."""
+
+    @abstractmethod
+    def run(self) -> List[List[int]]:
+        """Run all machines until they have halted, return all outputs."""
+
+
+class Network(Wiring):
+    """IntCode computers connected by ``asyncio.Queue`` inboxes."""
+
+    def __init__(self):
+        super().__init__()
+        self.inboxes: List[asyncio.Queue] = []
+        self.running = 0
+        self.blocked = 0
+        self.queued = 0
+
+    def send(self, destination: int, value: int):
+        """Put a value into the inbox of ``destination``."""
+        self.inboxes[destination].put_nowait(value)
+        self.queued += 1
+
+    def check_deadlock(self):
+        """Raise ``Deadlock`` if no running machine can make progress."""
+        if self.running and self.blocked == self.running \
+                and not self.queued:
+            raise Deadlock(f"{self.running} machines wait for input")
+
+    async def drive(self, index: int):
+        """Run machine ``index`` until it halts."""
+        computer = self.machines[index]
+        inbox = self.inboxes[index]
+        inputs = self.initial[index]
+        while True:
+            self.deliver(index, computer.run_until_input(inputs))
+            if computer.has_halted():
+                break
+            self.blocked += 1
+            self.check_deadlock()
+            inputs = [await inbox.get()]
+            while not inbox.empty():
+                inputs.append(inbox.get_nowait())
+            self.queued -= len(inputs)
+            self.blocked -= 1
+        self.running -= 1
+        self.queued -= inbox.qsize()
+        self.check_deadlock()
+
+    async def start(self):
+        """Run all machines until they have halted."""
+        self.inboxes = [asyncio.Queue() for _ in self.machines]
+        self.running = len(self.machines)
+        self.blocked = self.queued = 0
+        tasks = [asyncio.ensure_future(self.drive(index))
+                 for index in range(len(self.machines))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def run(self) -> List[List[int]]:
+        """Run all machines until they have halted, return all outputs."""
+        asyncio.run(self.start())
+        return self.outputs
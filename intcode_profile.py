@@ -0,0 +1,140 @@
+"""
+Opt-in execution profiling for the IntCode computer.
+
+Attaching a ``Profile`` to a computer shadows its ``fetch`` and ``evaluate``
+methods with instrumented versions on that instance only, so computers
+without a profile keep running the plain interpreter loop.
+"""
+
+import json
+from collections import Counter
+from time import perf_counter
+from typing import Callable, Dict, List
+
+from texttable import Texttable
+
+from intcode import Computer, Instrument, Status
+from runner import run
+
+
+class Profile(Instrument):
+    """
+    Per-opcode and per-address execution counts, branch statistics for
+    opcodes 5 and 6, and the wall time of every ``evaluate`` call.
+    Instruction counts need the interpreter's ``fetch``; other execution
+    engines only report wall times.
+    """
+
+    def __init__(self):
+        self.opcodes: Counter = Counter()
+        self.addresses: Counter = Counter()
+        self.branches: Dict[int, List[int]] = {}
+        self.evaluations: List[float] = []
+        super().__init__()
+
+    def instrument(self, computer: Computer) -> Dict[str, Callable]:
+        """Return the profiled methods of ``computer``."""
+        fetch = computer.fetch
+        evaluate = computer.evaluate
+        opcodes = self.opcodes
+        addresses = self.addresses
+        branches = self.branches
+
+        pending = []
+
+        def count():
+            """Count the instruction fetched last, which has completed."""
+            addr, opcode, taken = pending.pop()
+            opcodes[opcode] += 1
+            addresses[addr] += 1
+            if taken is not None:
+                branches.setdefault(addr, [0, 0])[not taken] += 1
+
+        def profiled_fetch():
+            """
+            Count the previous instruction, as fetching only follows a
+            completed one, then fetch and keep the next one pending.
+            """
+            if pending:
+                count()
+            fetch()
+            opcode = computer.opcode
+            if opcode == 99:
+                return
+            taken = None
+            if opcode == 5 or opcode == 6:
+                taken = (computer.read(1) != 0) == (opcode == 5)
+            pending.append((computer.iptr, opcode, taken))
+
+        def profiled_evaluate(*args, **kwargs):
+            """
+            Evaluate and record the wall time. An instruction pending at the
+            end has completed only if it yielded an output.
+            """
+            start = perf_counter()
+            status = None
+            try:
+                status = evaluate(*args, **kwargs)
+                return status
+            finally:
+                self.evaluations.append(perf_counter() - start)
+                if pending and status is Status.YIELDED:
+                    count()
+                pending.clear()
+
+        return {"fetch": profiled_fetch, "evaluate": profiled_evaluate}
+
+    def as_dict(self) -> dict:
+        """Return the collected data as a JSON-compatible dict."""
+        return {
+            "instructions": sum(self.opcodes.values()),
+            "opcodes": {str(op): n for op, n in self.opcodes.items()},
+            "addresses": {str(addr): n for addr, n in self.addresses.items()},
+            "branches": {str(addr): {"taken": taken, "not_taken": not_taken}
+                         for addr, (taken, not_taken)
+                         in self.branches.items()},
+            "evaluations": self.evaluations,
+        }
+
+    def to_json(self) -> str:
+        """Return the collected data as JSON."""
+        return json.dumps(self.as_dict())
+
+    def draw(self, top: int = 10) -> str:
+        """Return tables of opcodes, the hottest addresses and branches."""
+        total = sum(self.opcodes.values())
+        opcodes = Texttable()
+        opcodes.header(["opcode", "count", "share"])
+        for opcode, count in self.opcodes.most_common():
+            opcodes.add_row([opcode, count, f"{count / max(total, 1):.1%}"])
+
+        addresses = Texttable()
+        addresses.header(["address", "count", "taken", "not taken"])
+        for addr, count in self.addresses.most_common(top):
+            taken, not_taken = self.branches.get(addr, ("", ""))
+            addresses.add_row([addr, count, taken, not_taken])
+
+        return "\n".join([
+            f"{total} instructions in {len(self.evaluations)} evaluations, "
+            f"{sum(self.evaluations):.3f}s",
+            opcodes.draw(), f"Top {top} addresses:", addresses.draw()])
+
+
+def main1():
+    """Profile the BOOST program of day 9 in sensor boost mode."""
+    computer = Computer("day9-input", lambda: 2, lambda value: False)
+    profile = computer.profile()
+    computer.evaluate()
+    print(profile.draw())
+
+
+def main2():
+    """Profile the arcade game of day 13 drawing the board."""
+    computer = Computer("day13-input", lambda: 0, lambda value: False)
+    profile = computer.profile()
+    computer.evaluate()
+    print(profile.draw())
+
+
+if __name__ == '__main__':
+    run(main1, main2)
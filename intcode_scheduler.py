@@ -0,0 +1,87 @@
+"""
+Round-robin time-slicing of IntCode computers.
+
+A ``Scheduler`` is wired like an ``intcode_network.Network``, as both share
+``intcode_network.Wiring``, but runs all machines in one thread, each for
+at most a fixed number of instructions per turn. A machine computing for a
+long time without output or input only delays the others by one time slice
+per round, instead of starving them.
+"""
+
+from collections import deque
+from typing import Callable, Deque, List, Set
+
+from intcode import InputRequired, Status
+from intcode_network import Deadlock, Wiring
+
+
+class Scheduler(Wiring):
+    """
+    IntCode computers connected by queues, run in turns of ``quantum``
+    instructions. Running replaces the machines' ``inp`` and ``out``.
+    """
+
+    def __init__(self, quantum: int = 1000):
+        super().__init__()
+        self.quantum = quantum
+        self.ready: Deque[int] = deque()
+        self.waiting: Set[int] = set()
+        self.inboxes: List[Deque[int]] = []
+        self.outboxes: List[List[int]] = []
+
+    def send(self, destination: int, value: int):
+        """Put a value into the inbox of ``destination``, waking it up."""
+        self.inboxes[destination].append(value)
+        if destination in self.waiting:
+            self.waiting.remove(destination)
+            self.ready.append(destination)
+
+    def start(self):
+        """Give every machine its inbox and I/O, and make it ready."""
+        self.inboxes = [deque(inputs) for inputs in self.initial]
+        self.outboxes = [[] for _ in self.machines]
+        self.ready = deque(range(len(self.machines)))
+        self.waiting = set()
+        for computer, inbox, outbox in zip(self.machines, self.inboxes,
+                                           self.outboxes):
+            computer.inp = self.reader(inbox)
+            computer.out = self.writer(outbox)
+
+    @staticmethod
+    def reader(inbox: Deque[int]) -> Callable[[], int]:
+        """Return an input function taking values from ``inbox``."""
+        def inp():
+            """Take the next value, or block."""
+            if not inbox:
+                raise InputRequired
+            return inbox.popleft()
+
+        return inp
+
+    @staticmethod
+    def writer(outbox: List[int]) -> Callable[[int], bool]:
+        """Return an output function collecting values in ``outbox``."""
+        def out(value):
+            """Collect the value without yielding."""
+            outbox.append(value)
+            return False
+
+        return out
+
+    def run(self) -> List[List[int]]:
+        """Run all machines until they have halted, return all outputs."""
+        self.start()
+        while self.ready:
+            index = self.ready.popleft()
+            status = self.machines[index].evaluate(self.quantum)
+            outbox = self.outboxes[index]
+            if outbox:
+                self.deliver(index, outbox.copy())
+                outbox.clear()
+            if status is Status.BLOCKED and not self.inboxes[index]:
+                self.waiting.add(index)
+            elif status is not Status.HALTED:
+                self.ready.append(index)
+        if self.waiting:
+            raise Deadlock(f"{len(self.waiting)} machines wait for input")
+        return self.outputs
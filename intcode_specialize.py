@@ -0,0 +1,176 @@
+"""
+Specialization of IntCode programs to known inputs.
+
+With the input prefix and the memory patches known, every instruction the
+program executes before it needs more input has known operands, and is
+folded away by running it. The residual program resumes from a state of that
+run: the memory at that point, behind a trampoline that address 0 jumps to.
+It prints the outputs made before, from a table if there are many of them,
+restores the cells of that jump, makes pending writes and the relative
+base, and jumps to the next instruction.
+The trampoline stays behind every cell of that memory, including the ones
+set to 0, so it overwrites only cells the program has never touched.
+
+Two states are candidates, and the smaller residual is returned:
+- The latest, where the program halts or needs more input. If it halts,
+  the residual is straight-line code printing the outputs:
+  ``104, value, ..., 99``.
+- The earliest one after all known inputs, when the program reads the last
+  of them. Without known inputs, this is the patched program itself, so
+  the residual is never larger than that.
+Instructions after the first unknown input are kept as they are: the
+program may modify itself and jump through memory, so they aren't folded.
+Run as a module, this specializes the diagnostic programs of days 5 and 9
+to their inputs, and the day 13 game to its board.
+"""
+
+from time import perf_counter
+from typing import Dict, List, Sequence, Tuple, Union
+
+from texttable import Texttable
+
+from intcode import Computer, InputRequired
+from runner import run
+
+JUMP = (1105, 1)
+LOOP_CELLS = 23
+
+
+def replay(outputs: Sequence[int], start: int) -> List[int]:
+    """
+    Return code placed at ``start`` that prints ``outputs``: 104 for each
+    one, or a loop over a table of them, whichever is shorter. The loop uses
+    the relative base, which is 0 before and after.
+    """
+    printed = [cell for value in outputs for cell in (104, value)]
+    if len(printed) <= len(outputs) + LOOP_CELLS:
+        return printed
+    table = start + len(JUMP) + 1
+    counter = table + len(outputs)
+    loop = counter + 7
+    return [*JUMP, counter + 1, *outputs, 0,
+            1101, len(outputs), 0, counter,
+            109, table,
+            204, 0,
+            109, 1,
+            101, -1, counter, counter,
+            1005, counter, loop,
+            109, -counter]
+
+
+def resume(cells: Dict[int, int], outputs: Sequence[int], base: int,
+           iptr: int, writes: Sequence[Tuple[int, int]] = ()) -> List[int]:
+    """
+    Return a program with the memory ``cells``, which prints ``outputs``,
+    makes the (address, value) ``writes``, sets the relative base and jumps
+    to ``iptr``.
+    """
+    size = 1 + max([2, *cells])
+    residual = [cells.get(addr, 0) for addr in range(size)]
+    if not (outputs or writes or base or iptr):
+        return residual
+    trampoline = replay(outputs, size)
+    for addr in range(len(JUMP) + 1):
+        trampoline += [1101, residual[addr], 0, addr]
+    for addr, value in writes:
+        trampoline += [1101, value, 0, addr]
+    trampoline += [109, base, *JUMP, iptr]
+    residual[:len(JUMP) + 1] = [*JUMP, size]
+    return residual + trampoline
+
+
+def specialize(tape: Union[Sequence[int], str], inputs: Sequence[int] = (),
+               patches: Dict[int, int] = None) -> List[int]:
+    """
+    Return the residual program of ``tape`` for the memory patches and the
+    known ``inputs``. Given the inputs following those, it outputs the same
+    values as the original program given all of them.
+    """
+    computer = Computer(tape)
+    for addr, value in (patches or {}).items():
+        computer.memory[addr] = value
+    pending = list(inputs)
+    outputs = []
+    candidates = []
+    if not pending:
+        candidates.append(resume(dict(computer.memory.items()), (), 0, 0))
+
+    def inp():
+        """
+        Take a known input, keeping the residual that makes its write
+        before the last one is taken, or block.
+        """
+        if not pending:
+            raise InputRequired
+        if len(pending) == 1:
+            candidates.append(resume(
+                dict(computer.memory.items()), outputs, computer.base,
+                computer.iptr + 2, [(computer.get_address(1), pending[0])]))
+        return pending.pop(0)
+
+    def out(value):
+        """Collect the value without yielding."""
+        outputs.append(value)
+        return False
+
+    computer.inp, computer.out = inp, out
+    computer.evaluate()
+    if computer.has_halted():
+        candidates.append([cell for value in outputs
+                           for cell in (104, value)] + [99])
+    else:
+        candidates.append(resume(dict(computer.memory.items()), outputs,
+                                 computer.base, computer.iptr))
+    return min(candidates, key=len)
+
+
+def specializations() -> Texttable:
+    """
+    Specialize programs, and compare the residual programs with the
+    originals in size and run time, checking that they output the same.
+    """
+    table = Texttable(max_width=0)
+    table.set_cols_dtype(["t", "t", "i", "i", "f", "f", "t"])
+    table.header(["program", "known inputs", "cells", "residual cells",
+                  "original s", "residual s", "same outputs"])
+    cases = [("day5-input", [1], None, []), ("day5-input", [5], None, []),
+             ("day9-input", [1], None, []), ("day9-input", [2], None, []),
+             ("day13-input", [], {0: 2}, [0, 0, 1, -1]),
+             ("day13-input", [0], {0: 2}, [0, 1, -1]),
+             ([1101, 0, 0, 12, 3, 11, 3, 13, 4, 12, 99], [7], None, [5])]
+    for path, inputs, patches, rest in cases:
+        original = Computer(path)
+        residual = specialize(path, inputs, patches)
+        results = []
+        for tape, given in ((path, inputs + rest), (residual, rest)):
+            computer = Computer(tape)
+            if tape is path:
+                for addr, value in (patches or {}).items():
+                    computer.memory[addr] = value
+            start = perf_counter()
+            outputs = computer.run_until_input(given)
+            results.append((perf_counter() - start, outputs))
+        (time, outputs), (residual_time, residual_outputs) = results
+        table.add_row([path, f"{inputs} then {rest}",
+                       len(list(original.memory.items())), len(residual),
+                       time, residual_time,
+                       "yes" if outputs == residual_outputs else "NO"])
+    return table
+
+
+def main1():
+    """Print the specializations of the intcode inputs."""
+    print(specializations().draw())
+
+
+def main2():
+    """Run the BOOST program of day 9 in sensor mode, specialized once."""
+    residual = specialize("day9-input", [2])
+    start = perf_counter()
+    for _ in range(1000):
+        outputs = Computer(residual).run_until_input()
+    print(f"{outputs}, 1000 runs in {perf_counter() - start:.3f}s")
+
+
+if __name__ == '__main__':
+    run(main1, main2)
@@ -0,0 +1,179 @@
+"""
+Symbolic execution of IntCode programs over affine expressions.
+
+Selected memory cells start out as variables. Adds and multiplies propagate
+``Affine`` expressions through memory for as long as the results stay
+linear. Reading through a symbolic address yields ``UNKNOWN``, which is
+fine as long as it is overwritten before it matters. Everything that
+decides control flow (instruction words, write addresses, compares and
+branches) has to stay concrete. If a program halts this way, the value it
+leaves in a cell is an affine function of the variables, and the inputs
+producing a target value can be solved for directly instead of running the
+program for every candidate.
+"""
+
+from itertools import product
+from typing import Dict, List, Sequence, Tuple, Union
+
+from intcode import Computer, Status
+
+Value = Union[int, "Affine", "Unknown"]
+
+
+class SymbolicError(Exception):
+    """Raised when a run can't be followed symbolically."""
+
+
+class Unknown:
+    """A value read through a symbolic address, see ``UNKNOWN``."""
+
+    def __add__(self, other: Value) -> "Unknown":
+        return self
+
+    __radd__ = __mul__ = __rmul__ = __add__
+
+    def __eq__(self, other):
+        raise SymbolicError("comparison of an unknown value")
+
+    __ne__ = __lt__ = __gt__ = __eq__
+    __hash__ = None
+
+    def __bool__(self):
+        raise SymbolicError("condition on an unknown value")
+
+    def __repr__(self):
+        return "UNKNOWN"
+
+
+UNKNOWN = Unknown()
+
+
+class Affine:
+    """An affine integer expression: a constant plus weighted variables."""
+
+    def __init__(self, coefficients: Dict[str, int], constant: int = 0):
+        self.coefficients = coefficients
+        self.constant = constant
+
+    @classmethod
+    def variable(cls, name: str) -> "Affine":
+        """Return the expression consisting of one variable."""
+        return cls({name: 1})
+
+    @staticmethod
+    def simplify(coefficients: Dict[str, int], constant: int) -> Value:
+        """Drop zero coefficients, and return a constant as an int."""
+        coefficients = {name: weight for name, weight in coefficients.items()
+                        if weight}
+        return Affine(coefficients, constant) if coefficients else constant
+
+    def __add__(self, other: Value) -> Value:
+        if isinstance(other, Unknown):
+            return other
+        if isinstance(other, Affine):
+            coefficients = dict(self.coefficients)
+            for name, weight in other.coefficients.items():
+                coefficients[name] = coefficients.get(name, 0) + weight
+            return self.simplify(coefficients, self.constant + other.constant)
+        return Affine(self.coefficients, self.constant + other)
+
+    __radd__ = __add__
+
+    def __mul__(self, other: Value) -> Value:
+        if isinstance(other, Unknown):
+            return other
+        if isinstance(other, Affine):
+            raise SymbolicError(f"non-linear product: ({self}) * ({other})")
+        return self.simplify({name: weight * other for name, weight
+                              in self.coefficients.items()},
+                             self.constant * other)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        raise SymbolicError(f"symbolic comparison: {self}")
+
+    __ne__ = __lt__ = __gt__ = __eq__
+    __hash__ = None
+
+    def __bool__(self):
+        raise SymbolicError(f"symbolic condition: {self}")
+
+    def __repr__(self):
+        terms = [f"{weight}*{name}" for name, weight
+                 in sorted(self.coefficients.items())]
+        return " + ".join(terms + [str(self.constant)])
+
+
+class SymbolicComputer(Computer):
+    """
+    An IntCode Computer whose memory may hold ``Affine`` values. The
+    constructor is the same as ``Computer``'s.
+    :raise SymbolicError: From ``self.evaluate``, when a symbolic value
+                          would decide control flow or a write address, or
+                          be multiplied with another one.
+    """
+
+    def fetch(self):
+        """Fetch, requiring a concrete instruction word."""
+        if not isinstance(self.memory.get(self.iptr, 0), int):
+            raise SymbolicError(f"symbolic instruction at {self.iptr}")
+        super().fetch()
+
+    def get_address(self, offset):
+        """Calculate an address, requiring it to be concrete."""
+        addr = super().get_address(offset)
+        if not isinstance(addr, int):
+            raise SymbolicError(f"symbolic address at {self.iptr}")
+        return addr
+
+    def read(self, offset):
+        """Read a value, which is unknown behind a symbolic address."""
+        addr = super().get_address(offset)
+        return self.memory.get(addr, 0) if isinstance(addr, int) \
+            else UNKNOWN
+
+
+def solve_affine(tape: Union[Sequence[int], str],
+                 variables: Dict[int, Sequence[int]], result: int,
+                 target: int, max_steps: int = 10 ** 6
+                 ) -> List[Tuple[int, ...]]:
+    """
+    Find all assignments of the variable cells for which the program
+    leaves ``target`` in cell ``result``, by running it once symbolically.
+    :param variables: The candidate values of each variable cell.
+    :return: The solutions, as values in the order of ``variables``.
+    :raise SymbolicError: If the result isn't affine in the variables, or
+                          the program doesn't halt without input within
+                          ``max_steps`` instructions.
+    """
+    def inp():
+        """Refuse to read input."""
+        raise SymbolicError("the program reads input")
+
+    computer = SymbolicComputer(tape, inp, lambda value: False)
+    names = [f"m{addr}" for addr in variables]
+    for addr, name in zip(variables, names):
+        computer.memory[addr] = Affine.variable(name)
+    if computer.evaluate(max_steps) is not Status.HALTED:
+        raise SymbolicError(f"no halt within {max_steps} instructions")
+    value = computer.memory.get(result, 0)
+    if isinstance(value, Unknown):
+        raise SymbolicError(f"cell {result} is unknown")
+    if not isinstance(value, Affine):
+        return list(product(*variables.values())) if value == target else []
+
+    ranges = dict(zip(names, variables.values()))
+    solved = next(name for name in names if name in value.coefficients)
+    weight = value.coefficients[solved]
+    solutions = []
+    others = [name for name in names if name != solved]
+    for values in product(*(ranges[name] for name in others)):
+        assignment = dict(zip(others, values))
+        rest = target - value.constant - sum(
+            value.coefficients.get(name, 0) * assignment[name]
+            for name in others)
+        if rest % weight == 0 and rest // weight in ranges[solved]:
+            assignment[solved] = rest // weight
+            solutions.append(tuple(assignment[name] for name in names))
+    return solutions
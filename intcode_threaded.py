@@ -0,0 +1,200 @@
+"""
+A threaded-code execution engine for the IntCode computer.
+
+Every instruction is translated once into a closure with its operands
+pre-bound, and the closures are dispatched in a tight loop. Operand access
+is specialized per mode without branching: each operand is read as
+``get(offset + holder[0], 0)``, where ``get`` is the memory's ``get`` for
+position and relative mode, or a one-element dict's ``get`` holding the
+constant for immediate mode, and ``holder`` is either the relative base cell
+or a cell that is always 0.
+"""
+
+import sys
+from typing import Callable, Dict, Optional, Set
+
+from intcode import Computer, InputRequired, LENGTHS, Status, decode
+
+
+class _Yield(Exception):
+    """Raised by an output instruction if the computation should yield."""
+
+
+class ThreadedComputer(Computer):
+    """
+    An IntCode Computer that runs translated closures instead of
+    interpreting instructions. The constructor is the same as
+    ``Computer``'s.
+    Translations are made lazily when an address is first executed, and are
+    dropped when the program writes to any of the instruction's cells.
+    Translating costs more than interpreting an instruction once, so this
+    pays off for long-running programs such as day 9 and day 13.
+    Memory changes from outside should be done before calling
+    ``self.evaluate``, or be followed by ``self.invalidate``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.code: Dict[int, Callable[[], int]] = {}
+        self.owners: Dict[int, Set[int]] = {}
+        self.spans: Dict[int, int] = {}
+        super().__init__(*args, **kwargs)
+
+    @property
+    def base(self):
+        """The relative base, kept in a cell shared with the closures."""
+        return self.rb[0]
+
+    @base.setter
+    def base(self, value):
+        try:
+            self.rb[0] = value
+        except AttributeError:
+            self.rb = [value]
+
+    def invalidate(self, addr):
+        """Drop all translations covering the given address."""
+        for start in self.owners.pop(addr, ()):
+            del self.code[start]
+            for cell in range(start, self.spans.pop(start)):
+                if cell != addr:
+                    self.owners[cell].discard(start)
+
+    def operand(self, addr, offset, mode):
+        """Return the ``get``, offset and holder to read a parameter with."""
+        value = self.memory.get(addr + offset, 0)
+        if mode == 0:
+            return self.memory.get, value, [0]
+        if mode == 1:
+            return {value: value}.get, value, [0]
+        return self.memory.get, value, self.rb
+
+    def target(self, addr, offset, mode):
+        """Return the offset and holder to write a parameter with."""
+        return self.memory.get(addr + offset, 0), self.rb if mode else [0]
+
+    def translate(self, addr):
+        """
+        Translate the instruction at ``addr`` into a closure returning the
+        next address, and register it. Return None on the HALT code.
+        """
+        number = self.memory.get(addr, 0)
+        opcode, modes = decode(number)
+        if opcode == 99:
+            return None
+        length = LENGTHS[opcode]
+        nxt = addr + length
+        mem = self.memory
+        owners = self.owners
+        invalidate = self.invalidate
+        computer = self
+        get1, o1, h1 = self.operand(addr, 1, modes[0])
+        if length > 2:
+            get2, o2, h2 = self.operand(addr, 2, modes[1])
+        if length > 3:
+            o3, h3 = self.target(addr, 3, modes[2])
+
+        if opcode == 1:
+            def instruction():
+                target = o3 + h3[0]
+                mem[target] = get1(o1 + h1[0], 0) + get2(o2 + h2[0], 0)
+                if target in owners:
+                    invalidate(target)
+                return nxt
+        elif opcode == 2:
+            def instruction():
+                target = o3 + h3[0]
+                mem[target] = get1(o1 + h1[0], 0) * get2(o2 + h2[0], 0)
+                if target in owners:
+                    invalidate(target)
+                return nxt
+        elif opcode == 3:
+            o1, h1 = self.target(addr, 1, modes[0])
+
+            def instruction():
+                value = computer.inp()
+                target = o1 + h1[0]
+                mem[target] = value
+                if target in owners:
+                    invalidate(target)
+                return nxt
+        elif opcode == 4:
+            def instruction():
+                if computer.out(get1(o1 + h1[0], 0)):
+                    raise _Yield(nxt)
+                return nxt
+        elif opcode == 5:
+            def instruction():
+                if get1(o1 + h1[0], 0) != 0:
+                    return get2(o2 + h2[0], 0)
+                return nxt
+        elif opcode == 6:
+            def instruction():
+                if get1(o1 + h1[0], 0) == 0:
+                    return get2(o2 + h2[0], 0)
+                return nxt
+        elif opcode == 7:
+            def instruction():
+                target = o3 + h3[0]
+                mem[target] = 1 if get1(o1 + h1[0], 0) < \
+                    get2(o2 + h2[0], 0) else 0
+                if target in owners:
+                    invalidate(target)
+                return nxt
+        elif opcode == 8:
+            def instruction():
+                target = o3 + h3[0]
+                mem[target] = 1 if get1(o1 + h1[0], 0) == \
+                    get2(o2 + h2[0], 0) else 0
+                if target in owners:
+                    invalidate(target)
+                return nxt
+        else:
+            rb = self.rb
+
+            def instruction():
+                rb[0] += get1(o1 + h1[0], 0)
+                return nxt
+
+        self.code[addr] = instruction
+        self.spans[addr] = nxt
+        for cell in range(addr, nxt):
+            owners.setdefault(cell, set()).add(addr)
+        return instruction
+
+    def evaluate(self, max_steps: Optional[int] = None) -> Status:
+        """
+        Start processing the program until either the HALT code (99) is
+        reached, the program yields after having written to ``self.out``,
+        ``self.inp`` raises ``InputRequired``, or ``max_steps`` instructions
+        have been executed. Executed instructions are added to
+        ``self.steps``.
+        """
+        code = self.code
+        ip = self.iptr
+        budget = sys.maxsize if max_steps is None else max_steps
+        steps = 0
+        try:
+            while True:
+                try:
+                    for steps in range(steps, budget):
+                        ip = code[ip]()
+                    steps = budget
+                    if ip in code or self.translate(ip) is not None:
+                        return Status.BUDGET
+                except KeyError:
+                    if ip in code:
+                        raise
+                    if self.translate(ip) is not None:
+                        continue
+                self.opcode = 99
+                return Status.HALTED
+        except _Yield as signal:
+            ip = signal.args[0]
+            steps += 1
+            self.opcode = 4
+            return Status.YIELDED
+        except InputRequired:
+            return Status.BLOCKED
+        finally:
+            self.iptr = ip
+            self.steps += steps
@@ -0,0 +1,135 @@
+"""
+A bounded execution trace for the IntCode computer.
+
+The last N executed instructions are recorded into ring buffers that are
+allocated once, so tracing uses fixed memory and can stay enabled for long
+runs. Like ``intcode_profile``, attaching shadows ``fetch`` and ``evaluate``
+on one computer instance, and needs the interpreter's ``fetch``.
+"""
+
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from intcode import Computer, Instrument, LENGTHS, Status
+
+
+class TraceEntry(NamedTuple):
+    """An executed instruction with its raw parameter cells."""
+    address: int
+    opcode: int
+    modes: Tuple[int, int, int]
+    operands: Tuple[int, ...]
+    base: int
+
+    def __str__(self):
+        modes = "".join(str(mode) for mode in reversed(self.modes))
+        operands = ",".join(str(operand) for operand in self.operands)
+        return f"{self.address:>6}: {modes}{self.opcode:02} {operands:<30} " \
+               f"base={self.base}"
+
+
+class TraceError(ValueError):
+    """A ``ValueError`` from a traced computer, carrying the trace."""
+
+    def __init__(self, message: str, trace: List[TraceEntry]):
+        lines = "\n".join(str(entry) for entry in trace)
+        super().__init__(f"{message}\nlast {len(trace)} instructions:\n"
+                         f"{lines}")
+        self.trace = trace
+
+
+class Trace(Instrument):
+    """
+    The last ``size`` instructions executed by a computer. The ring has one
+    more slot, for the instruction fetched but not yet completed.
+    """
+
+    def __init__(self, size: int = 1000):
+        self.size = size
+        slots = size + 1
+        self.addresses = [0] * slots
+        self.opcodes = [0] * slots
+        self.modes: List[Optional[Tuple[int, int, int]]] = [None] * slots
+        self.operands = [0] * (3 * slots)
+        self.bases = [0] * slots
+        self.position = 0
+        self.count = 0
+        super().__init__()
+
+    def instrument(self, computer: Computer) -> Dict[str, Callable]:
+        """Return the traced methods of ``computer``."""
+        fetch = computer.fetch
+        evaluate = computer.evaluate
+        slots = self.size + 1
+        addresses, opcodes, modes = self.addresses, self.opcodes, self.modes
+        operands, bases = self.operands, self.bases
+        pending = False
+
+        def record():
+            """Keep the instruction in the current slot, as completed."""
+            self.position = (self.position + 1) % slots
+            self.count += 1
+
+        def traced_fetch():
+            """
+            Record the previous instruction, as fetching only follows a
+            completed one, then fetch the next one into the current slot.
+            """
+            nonlocal pending
+            if pending:
+                record()
+                pending = False
+            fetch()
+            if computer.opcode == 99:
+                return
+            position = self.position
+            addr = computer.iptr
+            get = computer.memory.get
+            addresses[position] = addr
+            opcodes[position] = computer.opcode
+            modes[position] = computer.modes
+            bases[position] = computer.base
+            operands[3 * position] = get(addr + 1, 0)
+            operands[3 * position + 1] = get(addr + 2, 0)
+            operands[3 * position + 2] = get(addr + 3, 0)
+            pending = True
+
+        def traced_evaluate(*args, **kwargs):
+            """
+            Evaluate, adding the trace to errors. An instruction pending at
+            the end is recorded if it yielded an output, or failed.
+            """
+            nonlocal pending
+            status = None
+            try:
+                status = evaluate(*args, **kwargs)
+                return status
+            except ValueError as error:
+                if pending:
+                    record()
+                    pending = False
+                raise TraceError(str(error), self.dump()) from error
+            finally:
+                if pending and status is Status.YIELDED:
+                    record()
+                pending = False
+
+        return {"fetch": traced_fetch, "evaluate": traced_evaluate}
+
+    def dump(self) -> List[TraceEntry]:
+        """Return the recorded instructions, oldest first."""
+        slots = self.size + 1
+        length = min(self.count, self.size)
+        start = (self.position - length) % slots
+        entries = []
+        for offset in range(length):
+            i = (start + offset) % slots
+            n_operands = LENGTHS.get(self.opcodes[i], 1) - 1
+            entries.append(TraceEntry(
+                self.addresses[i], self.opcodes[i], self.modes[i],
+                tuple(self.operands[3 * i:3 * i + n_operands]),
+                self.bases[i]))
+        return entries
+
+    def format(self) -> str:
+        """Return the recorded instructions as text, oldest first."""
+        return "\n".join(str(entry) for entry in self.dump())
@@ -1,5 +1,8 @@
 """Run the main functions for part 1 and 2, then report the results."""
 
+import contextlib
+import io
+
 
 def run(main1, main2):
     """Run the main functions for part 1 and two."""
@@ -7,3 +10,20 @@ def run(main1, main2):
     main1()
     print("Part 2:")
     main2()
+
+
+def run_with(module, factory, mains=None) -> str:
+    """
+    Run the main functions of a puzzle module, both parts by default, with
+    its ``Computer`` replaced by ``factory``, and return what they print.
+    """
+    original = module.Computer
+    module.Computer = factory
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            for main in mains or (module.main1, module.main2):
+                main()
+    finally:
+        module.Computer = original
+    return output.getvalue()